@@ -0,0 +1,236 @@
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+import numpy as np
+import soundfile as sf
+from audio.mixer import Mixer
+from audio.project import Project
+from audio.render import Renderer
+
+# Stems of a split project are summed in float, then written once
+STEM_SUBTYPE = "FLOAT"
+
+
+# --- Highest Resident Memory of This Process So Far (Bytes, None If Unknown) ---
+def peak_memory():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# --- Open a Session Headlessly: Mixer at the Session Rate, No Streams ---
+def open_session(path):
+    project = Project(path)
+    mixer = Mixer(fs=project.read().get("fs", 44100))
+    project.load(mixer)
+    return mixer
+
+
+# --- Tracks the Mix Would Actually Hear (Mute and Solo Resolved) ---
+def audible(tracks):
+    any_solo = any(t.is_soloed for t in tracks)
+    return [
+        i
+        for i, t in enumerate(tracks)
+        if t.length and not t.is_muted and (t.is_soloed or not any_solo)
+    ]
+
+
+# --- Spread Track Indexes Over Groups, Longest Tracks First ---
+def balance(tracks, indexes, groups):
+    loads = [0] * groups
+    members = [[] for _ in range(groups)]
+    for i in sorted(indexes, key=lambda i: -tracks[i].length):
+        g = loads.index(min(loads))
+        members[g].append(i)
+        loads[g] += tracks[i].length
+    return [sorted(m) for m in members if m]
+
+
+# --- One Job per Project, or per Track Group When a Project Is Split ---
+#
+# Splitting loads the project here once, so rate conversions and frozen
+# renders are cached before the workers start, and every group renders
+# to the same end sample so the stems line up.
+def plan(paths, out_dir=None, split=1, subtype="PCM_16"):
+    jobs = []
+    for path in paths:
+        root = os.path.splitext(os.path.basename(path))[0]
+        folder = out_dir or os.path.dirname(os.path.abspath(path))
+        out = os.path.join(folder, root + ".wav")
+        job = {"project": path, "out": out, "subtype": subtype, "tracks": None}
+        if split <= 1:
+            jobs.append(dict(job, group=0, groups=1))
+            continue
+        mixer = open_session(path)
+        indexes = audible(mixer.tracks)
+        mixer.set_tracks([mixer.tracks[i] for i in indexes])
+        groups = balance(mixer.tracks, range(len(indexes)), split)
+        groups = [[indexes[i] for i in g] for g in groups] or [[]]
+        for g, members in enumerate(groups):
+            jobs.append(
+                dict(
+                    job,
+                    tracks=members,
+                    end=mixer.length,
+                    group=g,
+                    groups=len(groups),
+                    stem=f"{out}.{g}.stem.wav" if len(groups) > 1 else None,
+                )
+            )
+    return jobs
+
+
+# --- Worker: Load, Mix Offline Through Mixer / Renderer, Report ---
+def render_job(job):
+    began = time.perf_counter()
+    result = {"job": job}
+    try:
+        mixer = open_session(job["project"])
+        tracks = mixer.tracks
+        end = None
+        if job["tracks"] is not None:
+            tracks = [tracks[i] for i in job["tracks"]]
+            # Mute / solo were resolved across the whole project when planning
+            for track in tracks:
+                track.is_soloed = False
+            end = job["end"]
+        mixer.set_tracks(tracks)
+        stem = job.get("stem")
+        renderer = Renderer(mixer, subtype=STEM_SUBTYPE if stem else job["subtype"])
+        result.update(renderer.render(stem or job["out"], end_sample=end))
+        result["track_count"] = len(tracks)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["wall"] = time.perf_counter() - began
+    result["peak_memory"] = peak_memory()
+    return result
+
+
+# --- Sum a Split Project's Stems Into Its Output File ---
+def mix_stems(stems, out, subtype, blocksize=65536):
+    began = time.perf_counter()
+    files = [sf.SoundFile(path) for path in stems]
+    try:
+        fs, channels = files[0].samplerate, files[0].channels
+        frames = 0
+        with sf.SoundFile(
+            out, mode="w", samplerate=fs, channels=channels, subtype=subtype
+        ) as f:
+            block = np.zeros((blocksize, channels), dtype=np.float32)
+            while True:
+                block.fill(0)
+                n = 0
+                for stem in files:
+                    part = stem.read(blocksize, dtype="float32", always_2d=True)
+                    block[: len(part)] += part
+                    n = max(n, len(part))
+                if n == 0:
+                    break
+                f.write(block[:n])
+                frames += n
+    finally:
+        for stem in files:
+            stem.close()
+    for path in stems:
+        os.remove(path)
+    return {"path": out, "frames": frames, "elapsed": time.perf_counter() - began}
+
+
+def describe(result):
+    job = result["job"]
+    name = os.path.basename(job["project"])
+    if job["groups"] > 1:
+        name += f" [{job['group'] + 1}/{job['groups']}]"
+    if "error" in result:
+        return f"{name:<32} FAILED {result['error']}"
+    peak = result["peak_memory"]
+    peak = "?" if peak is None else f"{peak / 2**20:.0f} MB"
+    return (
+        f"{name:<32} {result['track_count']:>4} tracks "
+        f"{result['seconds']:8.1f} s audio in {result['wall']:6.2f} s "
+        f"{result['realtime']:7.0f}x realtime  peak {peak}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="main.py render", description="Headless offline mixdown of Tuidio projects"
+    )
+    parser.add_argument("projects", nargs="+", help=".tuidio session files")
+    parser.add_argument("--out", help="output folder (default: next to each project)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--split",
+        default="auto",
+        help="track groups per project; auto fills idle workers when there are "
+        "fewer projects than jobs",
+    )
+    parser.add_argument("--subtype", default="PCM_16")
+    args = parser.parse_args(argv)
+
+    missing = [p for p in args.projects if not Project(p).exists]
+    if missing:
+        parser.error("no such project: " + ", ".join(missing))
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    jobs_n = max(1, args.jobs)
+    if args.split == "auto":
+        split = max(1, jobs_n // len(args.projects))
+    else:
+        split = max(1, int(args.split))
+
+    began = time.perf_counter()
+    jobs = plan(args.projects, args.out, split, args.subtype)
+    planned = time.perf_counter() - began
+    workers = min(jobs_n, len(jobs))
+    print(f"{len(jobs)} jobs on {workers} workers (planned in {planned:.2f} s)")
+
+    stems = {}
+    failed = 0
+    seconds = 0.0
+    # A fresh process per job: peak memory is that job's alone
+    context = mp.get_context("spawn")
+    with context.Pool(workers, maxtasksperchild=1) as pool:
+        for result in pool.imap_unordered(render_job, jobs):
+            print(describe(result), flush=True)
+            job = result["job"]
+            if "error" in result:
+                failed += 1
+                continue
+            if job.get("stem"):
+                stems.setdefault(job["out"], []).append(job)
+            else:
+                seconds += result["seconds"]
+
+    for out, parts in stems.items():
+        job = parts[0]
+        if len(parts) != job["groups"]:
+            # A group failed; leave no half-mixed output behind
+            for part in parts:
+                os.remove(part["stem"])
+            continue
+        merged = mix_stems([p["stem"] for p in parts], out, job["subtype"])
+        seconds += merged["frames"] / sf.info(out).samplerate
+        print(
+            f"{os.path.basename(out):<32} mixed {len(parts)} stems "
+            f"in {merged['elapsed']:.2f} s"
+        )
+
+    elapsed = time.perf_counter() - began
+    speed = seconds / elapsed if elapsed > 0 else 0.0
+    print(
+        f"total {seconds:.1f} s audio in {elapsed:.2f} s "
+        f"({speed:.0f}x realtime), {failed} failed"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
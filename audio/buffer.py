@@ -0,0 +1,46 @@
+import numpy as np
+
+
+## --- SampleBuffer: Amortized Growable Buffer for Live Recording ---
+class SampleBuffer:
+    def __init__(self, capacity=44100 * 10, dtype=np.float32, channels=1):
+        self.dtype = dtype
+        self.channels = channels
+        self._data = np.zeros(self._shape(max(1, int(capacity))), dtype=dtype)
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    # --- Mono Buffers Stay 1-D; Multichannel Ones Are (frames, channels) ---
+    def _shape(self, frames):
+        return frames if self.channels == 1 else (frames, self.channels)
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    # --- Grow Geometrically So Appends Stay O(1) Amortized ---
+    def reserve(self, needed):
+        if needed <= len(self._data):
+            return
+        new = np.zeros(self._shape(max(needed, len(self._data) * 2)), dtype=self.dtype)
+        new[: self.length] = self._data[: self.length]
+        self._data = new
+
+    # --- Append a Block (Writer Thread Only) ---
+    def append(self, block):
+        n = len(block)
+        end = self.length + n
+        self.reserve(end)
+        self._data[self.length : end] = block
+        # Publish the new length only after the samples are in place
+        self.length = end
+
+    # --- Zero-copy View of the Frames Recorded So Far ---
+    def view(self):
+        n = self.length
+        return self._data[:n]
+
+    def clear(self):
+        self.length = 0
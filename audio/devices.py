@@ -0,0 +1,238 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+
+## --- DeviceRegistry: Cached Audio Device Capabilities, Scanned Off-thread ---
+#
+# PortAudio enumeration (and probing rates on ALSA) can take seconds, so it
+# never runs at import or on the UI thread. scan() builds an immutable tuple
+# of device records and swaps it in; readers just use whatever tuple is
+# current. Listeners are called from the scanning thread when the device
+# set changes (first scan, hot-plug). sounddevice is only imported by a
+# scan or a stream, so offline tools never need PortAudio.
+#
+# Hot-plug rescans run only when the sound device nodes change (or on
+# request), and enumerate in a fresh process: the running PortAudio is
+# never terminated under the UI, and stream opens never wait on a scan.
+# Every stream is opened through the registry; when a rescan found a new
+# device set, PortAudio catches up at the next open with nothing open.
+class DeviceRegistry:
+    RATES = (22050, 32000, 44100, 48000, 88200, 96000)
+    # Linux device nodes; their listing changing is the hot-plug signal
+    SOUND_NODES = "/dev/snd"
+
+    def __init__(self):
+        self.devices = ()
+        self.ready = threading.Event()
+        self.generation = 0
+        self.scan_seconds = 0.0
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._thread = None
+        # Streams open in this process; guarded by _portaudio
+        self._open = 0
+        self._portaudio = threading.Lock()
+        # Device set this process's PortAudio was initialized with
+        self._live = None
+        self._nodes = None
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    # --- Probe Which Common Rates a Device Accepts ---
+    def _rates(self, index, kind):
+        import sounddevice as sd
+
+        check = sd.check_input_settings if kind == "input" else sd.check_output_settings
+        rates = []
+        for rate in self.RATES:
+            try:
+                check(device=index, samplerate=rate)
+                rates.append(rate)
+            except Exception:
+                pass
+        return tuple(rates)
+
+    def _describe(self, index, info, known):
+        inputs = int(info.get("max_input_channels", 0))
+        outputs = int(info.get("max_output_channels", 0))
+        cached = known.get((info.get("name"), inputs, outputs))
+        if cached is not None:
+            # Same device as last scan: skip re-probing its rates
+            return dict(cached, index=index)
+        return {
+            "index": index,
+            "name": info.get("name", f"Device {index}"),
+            "hostapi": info.get("hostapi", 0),
+            "max_input_channels": inputs,
+            "max_output_channels": outputs,
+            "default_samplerate": float(info.get("default_samplerate", 44100)),
+            "default_low_input_latency": info.get("default_low_input_latency", 0.0),
+            "default_low_output_latency": info.get("default_low_output_latency", 0.0),
+            "default_high_input_latency": info.get("default_high_input_latency", 0.0),
+            "default_high_output_latency": info.get("default_high_output_latency", 0.0),
+            "input_rates": self._rates(index, "input") if inputs else (),
+            "output_rates": self._rates(index, "output") if outputs else (),
+        }
+
+    @property
+    def busy(self):
+        return self._open > 0
+
+    # --- Open a sounddevice Stream ("OutputStream", "Stream", ...) ---
+    def open_stream(self, kind, **settings):
+        import sounddevice as sd
+
+        with self._portaudio:
+            if self.stale and not self._open:
+                self._reinitialize(sd)
+            stream = getattr(sd, kind)(**settings)
+            self._open += 1
+        return stream
+
+    def close_stream(self, stream):
+        with self._portaudio:
+            try:
+                stream.stop()
+                stream.close()
+            finally:
+                self._open -= 1
+
+    # --- Open, Start and Always Close a Stream Around a Block ---
+    @contextmanager
+    def stream(self, kind, **settings):
+        stream = self.open_stream(kind, **settings)
+        try:
+            stream.start()
+            yield stream
+        finally:
+            self.close_stream(stream)
+
+    # --- A Rescan Saw Devices This Process's PortAudio Does Not Know ---
+    @property
+    def stale(self):
+        return self._live is not None and self._live != self._signature(self.devices)
+
+    # --- Re-open PortAudio on the New Device Set (No Stream Open) ---
+    #
+    # PortAudio freezes its device list at initialization and has no
+    # public refresh; sounddevice's private hooks are used when present.
+    # Called with _portaudio held; the slow rate probing already ran in the
+    # rescan process.
+    def _reinitialize(self, sd):
+        if hasattr(sd, "_terminate") and hasattr(sd, "_initialize"):
+            sd._terminate()
+            sd._initialize()
+        self._live = self._signature(self.devices)
+
+    # --- Cheap Hot-plug Signal: the Sound Device Nodes Changed ---
+    # Always False where there are no such nodes; rescan on request there.
+    def hotplugged(self):
+        try:
+            nodes = sorted(os.listdir(self.SOUND_NODES))
+        except OSError:
+            return False
+        changed = self._nodes is not None and nodes != self._nodes
+        self._nodes = nodes
+        return changed
+
+    @staticmethod
+    def _signature(devices):
+        return [
+            (d["name"], d["max_input_channels"], d["max_output_channels"])
+            for d in devices
+        ]
+
+    # --- Enumerate Now (Blocking); True When the Device Set Changed ---
+    # rescan enumerates in a fresh process, which sees hot-plugged devices
+    def scan(self, rescan=False):
+        with self._lock:
+            began = time.perf_counter()
+            if rescan:
+                devices = _fresh_devices_elsewhere()
+                if devices is None:
+                    return False
+            else:
+                try:
+                    import sounddevice as sd
+
+                    found = sd.query_devices()
+                except Exception:
+                    found = []
+                known = dict(zip(self._signature(self.devices), self.devices))
+                devices = tuple(
+                    self._describe(i, d, known) for i, d in enumerate(found)
+                )
+                self._live = self._signature(devices)
+            changed = self._signature(devices) != self._signature(self.devices)
+            changed = changed or not self.ready.is_set()
+            self.devices = devices
+            self.scan_seconds = time.perf_counter() - began
+            if changed:
+                self.generation += 1
+            self.ready.set()
+
+        if changed:
+            for listener in list(self._listeners):
+                listener(self)
+        return changed
+
+    # --- Enumerate in a Background Thread (No-op While One Is Running) ---
+    def refresh(self, rescan=False):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self.scan, args=(rescan,), daemon=True)
+        self._thread.start()
+
+    # --- Cached Record for One Device (Scans Once If Nothing Is Cached) ---
+    def info(self, index):
+        if not self.ready.is_set():
+            self.scan()
+        for device in self.devices:
+            if device["index"] == index:
+                return device
+        return None
+
+    # --- (label, index) Pairs for Select Widgets ---
+    def inputs(self):
+        return [
+            (d["name"][:18], d["index"])
+            for d in self.devices
+            if d["max_input_channels"] > 0
+        ]
+
+    def outputs(self):
+        return [
+            (d["name"][:18], d["index"])
+            for d in self.devices
+            if d["max_output_channels"] > 0
+        ]
+
+
+# --- Full Scan in This (Fresh) Process; Runs in the Rescan Worker ---
+def _fresh_devices():
+    registry = DeviceRegistry()
+    registry.scan()
+    return registry.devices
+
+
+# --- Run _fresh_devices in a Spawned Process (None When It Fails) ---
+def _fresh_devices_elsewhere(timeout=30.0):
+    try:
+        with ProcessPoolExecutor(1, mp_context=mp.get_context("spawn")) as pool:
+            devices = pool.submit(_fresh_devices).result(timeout)
+    except Exception:
+        return None
+    # A process that could not load PortAudio sees no devices at all
+    return devices or None
+
+
+devices = DeviceRegistry()
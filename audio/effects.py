@@ -0,0 +1,391 @@
+import numpy as np
+
+# Sub-block length for the vectorized recursive filters
+_SUB = 64
+
+
+# --- Block Matrices of a TDF-II Biquad Over a _SUB-sample Sub-block ---
+#
+# Within a sub-block the section is linear in its input and its two state
+# values, so output and next state are matrix products: y = T x + C s and
+# s' = A[n] s + G x. Every matrix is built by running the section itself,
+# which stays exact for any coefficients (first-order, repeated poles).
+def _section_matrices(b, a, size=_SUB):
+    b0, b1, b2 = b
+    a1, a2 = a
+
+    def run(x, s1, s2):
+        out = np.empty(size)
+        states = np.empty((size + 1, 2))
+        states[0] = s1, s2
+        for i, v in enumerate(x):
+            y = b0 * v + s1
+            s1, s2 = b1 * v - a1 * y + s2, b2 * v - a2 * y
+            out[i] = y
+            states[i + 1] = s1, s2
+        return out, states
+
+    impulse = np.zeros(size)
+    impulse[0] = 1.0
+    h, drive = run(impulse, 0.0, 0.0)
+    c1, a_1 = run(np.zeros(size), 1.0, 0.0)
+    c2, a_2 = run(np.zeros(size), 0.0, 1.0)
+
+    lag = np.subtract.outer(np.arange(size), np.arange(size))
+    toeplitz = np.where(lag >= 0, h[np.maximum(lag, 0)], 0.0)
+    zero_input = np.stack([c1, c2], axis=1)
+    # powers[n] maps the state n samples ahead with no input
+    powers = np.stack([a_1, a_2], axis=2)
+    return toeplitz, zero_input, powers, drive[1:]
+
+
+## --- Effect: One Insert Stage Processing (channels, frames) Blocks ---
+#
+# Parameters are edited from the UI thread; derived coefficients are
+# swapped in as one tuple so the audio thread always sees a consistent set.
+# State is allocated when the channel count it is fed changes, and reset()
+# only raises a flag; the audio thread then zeroes state in place.
+class Effect:
+    kind = "effect"
+    PARAMS = ()
+    _channels = 0
+
+    def __init__(self, fs=44100, **params):
+        self.fs = fs
+        self.version = 0
+        self._reset = True
+        for name, default in self.PARAMS:
+            setattr(self, name, params.get(name, default))
+        self.configure()
+
+    def configure(self):
+        pass
+
+    # --- Change Parameters (UI Thread); Invalidates Any Frozen Render ---
+    def set(self, **params):
+        for name, value in params.items():
+            setattr(self, name, value)
+        self.version += 1
+        self.configure()
+
+    def reset(self):
+        self._reset = True
+
+    def set_rate(self, fs):
+        self.fs = fs
+        self.configure()
+        self._reset = True
+
+    def process(self, block):
+        if self._channels != block.shape[0]:
+            self._allocate(block.shape[0])
+            self._reset = False
+        elif self._reset:
+            self._clear()
+            self._reset = False
+        self._process(block)
+
+    def _allocate(self, channels):
+        self._channels = channels
+        self._clear()
+
+    # --- Zero the State In Place (Audio Thread, No Allocation) ---
+    def _clear(self):
+        pass
+
+    def _process(self, block):
+        raise NotImplementedError
+
+    # --- Extra Frames of Output After the Input Ends (Freeze Rendering) ---
+    def tail(self):
+        return 0
+
+    def to_dict(self):
+        state = {"type": self.kind}
+        state.update({name: getattr(self, name) for name, _ in self.PARAMS})
+        return state
+
+
+## --- Gain: Level Change Ramped Across a Block (No Zipper Noise) ---
+class Gain(Effect):
+    kind = "gain"
+    PARAMS = (("db", 0.0),)
+
+    def configure(self):
+        self._target = 10 ** (self.db / 20)
+
+    def _clear(self):
+        self._current = self._target
+
+    def _process(self, block):
+        target = self._target
+        if target == self._current:
+            if target != 1.0:
+                block *= target
+            return
+        block *= np.linspace(
+            self._current, target, block.shape[1], dtype=np.float32
+        )
+        self._current = target
+
+
+## --- Biquad: RBJ Cookbook EQ Section, Transposed Direct Form II ---
+#
+# Whole sub-blocks go through the precomputed block matrices, so a block
+# costs a few matrix products and a loop over sub-blocks, not samples.
+class Biquad(Effect):
+    kind = "biquad"
+    PARAMS = (("shape", "peak"), ("freq", 1000.0), ("q", 0.707), ("db", 0.0))
+
+    def configure(self):
+        w = 2 * np.pi * min(self.freq, self.fs * 0.49) / self.fs
+        cos, alpha = np.cos(w), np.sin(w) / (2 * max(self.q, 0.05))
+        a = 10 ** (self.db / 40)
+        shape = self.shape
+        if shape == "lowpass":
+            b = ((1 - cos) / 2, 1 - cos, (1 - cos) / 2)
+            d = (1 + alpha, -2 * cos, 1 - alpha)
+        elif shape == "highpass":
+            b = ((1 + cos) / 2, -(1 + cos), (1 + cos) / 2)
+            d = (1 + alpha, -2 * cos, 1 - alpha)
+        elif shape in ("lowshelf", "highshelf"):
+            sq = 2 * np.sqrt(a) * alpha
+            sign = 1 if shape == "lowshelf" else -1
+            b = (
+                a * ((a + 1) - sign * (a - 1) * cos + sq),
+                sign * 2 * a * ((a - 1) - sign * (a + 1) * cos),
+                a * ((a + 1) - sign * (a - 1) * cos - sq),
+            )
+            d = (
+                (a + 1) + sign * (a - 1) * cos + sq,
+                -sign * 2 * ((a - 1) + sign * (a + 1) * cos),
+                (a + 1) + sign * (a - 1) * cos - sq,
+            )
+        else:
+            b = (1 + alpha * a, -2 * cos, 1 - alpha * a)
+            d = (1 + alpha / a, -2 * cos, 1 - alpha / a)
+        b0, b1, b2 = (v / d[0] for v in b)
+        a1, a2 = d[1] / d[0], d[2] / d[0]
+        # Normalized transfer function, kept for reference checks
+        self.ba = ((b0, b1, b2), (1.0, a1, a2))
+        self._coeffs = _section_matrices((b0, b1, b2), (a1, a2))
+
+    def _allocate(self, channels):
+        self._channels = channels
+        self._state = np.zeros((channels, 2))
+
+    def _clear(self):
+        self._state.fill(0)
+
+    def _process(self, block):
+        toeplitz, zero_input, powers, drive = self._coeffs
+        channels, n = block.shape
+        x = block.astype(np.float64)
+        y = np.empty_like(x)
+        s = self._state
+        full = n - n % _SUB
+        if full:
+            xs = x[:, :full].reshape(channels, -1, _SUB)
+            # State each sub-block hands on, from its input alone
+            pushed = xs @ drive[::-1]
+            step = powers[_SUB].T
+            starts = np.empty(pushed.shape)
+            for j in range(xs.shape[1]):
+                starts[:, j] = s
+                s = s @ step + pushed[:, j]
+            y[:, :full] = (xs @ toeplitz.T + starts @ zero_input.T).reshape(
+                channels, full
+            )
+        rest = n - full
+        if rest:
+            xr = x[:, full:]
+            y[:, full:] = xr @ toeplitz[:rest, :rest].T + s @ zero_input[:rest].T
+            s = s @ powers[rest].T + xr @ drive[rest - 1 :: -1]
+        self._state = s
+        block[...] = y
+
+
+## --- Compressor: Feed-forward, Stereo-linked, Envelope per 32-sample Step ---
+class Compressor(Effect):
+    kind = "compressor"
+    PARAMS = (
+        ("threshold", -18.0),
+        ("ratio", 4.0),
+        ("attack", 0.005),
+        ("release", 0.1),
+        ("makeup", 0.0),
+    )
+    STEP = 32
+
+    def configure(self):
+        step = self.STEP / self.fs
+        self._coeffs = (
+            np.exp(-step / max(self.attack, 1e-4)),
+            np.exp(-step / max(self.release, 1e-4)),
+            self.threshold,
+            1 - 1 / max(self.ratio, 1.0),
+            self.makeup,
+        )
+
+    def _clear(self):
+        self._env = 0.0
+        self._gain = 1.0
+
+    def _process(self, block):
+        attack, release, threshold, slope, makeup = self._coeffs
+        n = block.shape[1]
+        steps = -(-n // self.STEP)
+        pad = steps * self.STEP - n
+        level = np.abs(np.pad(block, ((0, 0), (0, pad))))
+        peaks = level.reshape(block.shape[0], steps, self.STEP).max(axis=(0, 2))
+
+        # One envelope value per step; the loop is n / 32 long, not n
+        env = np.empty(steps)
+        e = self._env
+        for i, peak in enumerate(peaks.tolist()):
+            coeff = attack if peak > e else release
+            e = coeff * e + (1 - coeff) * peak
+            env[i] = e
+        self._env = e
+
+        over = 20 * np.log10(np.maximum(env, 1e-9)) - threshold
+        gains = 10 ** ((makeup - slope * np.maximum(over, 0.0)) / 20)
+        # Interpolate step gains across samples, continuing from last block
+        points = np.concatenate(([self._gain], gains))
+        ramp = np.interp(
+            np.arange(1, n + 1),
+            np.arange(steps + 1) * self.STEP,
+            points,
+        ).astype(np.float32)
+        self._gain = float(gains[-1])
+        block *= ramp
+
+    def tail(self):
+        return int(self.release * self.fs)
+
+
+## --- Delay: Feedback Echo Through a Circular Line, Processed in Spans ---
+class Delay(Effect):
+    kind = "delay"
+    PARAMS = (("time", 0.25), ("feedback", 0.35), ("mix", 0.3))
+    MAX_SECONDS = 4.0
+    # Rows the line is sized for up front; wider sources grow it once
+    LINE_CHANNELS = 2
+    _line = None
+
+    def configure(self):
+        delay = int(min(self.time, self.MAX_SECONDS) * self.fs)
+        self._coeffs = (max(1, delay), self.feedback, self.mix)
+        size = int(self.MAX_SECONDS * self.fs) + 1
+        if self._line is None or self._line.shape[1] != size:
+            # Sized here, off the audio thread; reset() only clears it. Keep
+            # the rows a wider source already grew the line to.
+            rows = self.LINE_CHANNELS if self._line is None else len(self._line)
+            rows = max(rows, self.LINE_CHANNELS)
+            self._line = np.zeros((rows, size), dtype=np.float32)
+            self._write = 0
+
+    def _allocate(self, channels):
+        self._channels = channels
+        if channels > len(self._line):
+            self._line = np.zeros((channels, self._line.shape[1]), dtype=np.float32)
+        self._clear()
+
+    def _clear(self):
+        self._line.fill(0)
+        self._write = 0
+
+    def _process(self, block):
+        delay, feedback, mix = self._coeffs
+        line = self._line[: block.shape[0]]
+        size = line.shape[1]
+        n = block.shape[1]
+        done = 0
+        # Spans no longer than the delay never read what they write
+        while done < n:
+            span = min(n - done, delay)
+            w = (self._write + np.arange(span)) % size
+            r = (w - delay) % size
+            x = block[:, done : done + span]
+            echo = line[:, r]
+            line[:, w] = x + feedback * echo
+            x += mix * echo
+            self._write = (self._write + span) % size
+            done += span
+
+    def tail(self):
+        delay, feedback, _ = self._coeffs
+        if feedback <= 0:
+            return delay
+        repeats = np.log(1e-3) / np.log(min(abs(feedback), 0.999))
+        return int(min(delay * (1 + repeats), 10 * self.fs))
+
+
+EFFECTS = {cls.kind: cls for cls in (Gain, Biquad, Compressor, Delay)}
+
+
+## --- EffectChain: Ordered Inserts for One Track ---
+class EffectChain:
+    def __init__(self, effects=(), fs=44100):
+        self.effects = tuple(effects)
+        self.fs = fs
+        self._structure = 0
+
+    def __len__(self):
+        return len(self.effects)
+
+    def __iter__(self):
+        return iter(self.effects)
+
+    # --- Changes Whenever an Insert Is Added, Removed or Edited ---
+    @property
+    def version(self):
+        return (self._structure, tuple(e.version for e in self.effects))
+
+    def set_effects(self, effects):
+        # One tuple swap: the audio thread sees the old or new chain, whole
+        self.effects = tuple(effects)
+        self._structure += 1
+
+    def add(self, effect):
+        if effect.fs != self.fs:
+            effect.set_rate(self.fs)
+        self.set_effects(self.effects + (effect,))
+        return effect
+
+    def remove(self, effect):
+        self.set_effects(e for e in self.effects if e is not effect)
+
+    def reset(self):
+        for effect in self.effects:
+            effect.reset()
+
+    def set_rate(self, fs):
+        self.fs = fs
+        for effect in self.effects:
+            effect.set_rate(fs)
+
+    # --- Run Every Insert Over a (channels, frames) Block In Place ---
+    def process(self, block):
+        for effect in self.effects:
+            effect.process(block)
+
+    def tail(self):
+        return sum(e.tail() for e in self.effects)
+
+    def to_list(self):
+        return [e.to_dict() for e in self.effects]
+
+    @classmethod
+    def from_list(cls, states, fs=44100):
+        effects = []
+        for state in states or ():
+            params = dict(state)
+            effect = EFFECTS.get(params.pop("type", None))
+            if effect is not None:
+                effects.append(effect(fs, **params))
+        return cls(effects, fs)
+
+    # --- Same Settings, Fresh State (Offline Renders, Freeze) ---
+    def clone(self):
+        return EffectChain.from_list(self.to_list(), self.fs)
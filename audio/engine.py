@@ -1,37 +1,233 @@
-import sounddevice as sd
 import soundfile as sf
 import threading
 import os
-import queue
 import tempfile
 import numpy as np
 import time
 import sys
+from audio.buffer import SampleBuffer
+from audio.devices import devices
+from audio.effects import EffectChain
+from audio.graph import MixGraph
+from audio.meters import MeterBank
+from audio.ring import FrameRing
+from audio.storage import MappedStore
+from audio.peaks import PeakIndex
+from audio.resample import cached_path, conform_store, remove_cached
+from audio.telemetry import StreamStats
 
 # --- Linux Audio Backend Configuration ---
 if sys.platform.startswith("linux"):
     os.environ["SD_API"] = "alsa"
 
 
+## --- Clip: Non-destructive Region of a Shared Source Buffer ---
+class Clip:
+    def __init__(self, source, start=0, offset=0, duration=None, gain=1.0, scale=1.0):
+        self.source = source
+        self.channels = source.shape[1] if source.ndim == 2 else 1
+        self.start = int(start)
+        self.offset = int(offset)
+        if duration is None:
+            duration = len(source) - self.offset
+        self.duration = max(0, min(int(duration), len(source) - self.offset))
+        self.gain = gain
+        self.scale = scale
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
+    # --- Split Into Two Clips Sharing the Same Source ---
+    def split(self, at):
+        cut = int(at) - self.start
+        if cut <= 0 or cut >= self.duration:
+            return self, None
+        left = Clip(self.source, self.start, self.offset, cut, self.gain, self.scale)
+        right = Clip(
+            self.source,
+            self.start + cut,
+            self.offset + cut,
+            self.duration - cut,
+            self.gain,
+            self.scale,
+        )
+        return left, right
+
+
+## --- ClipIndex: Time-bucketed Interval Index for Per-block Clip Lookup ---
+#
+# The timeline is cut into fixed buckets and each bucket lists, in start
+# order, every clip touching it. A block looks at the one or two buckets
+# it falls in, so a lookup costs the clips near the block no matter how
+# clips nest (one long clip under thousands of short ones included).
+class ClipIndex:
+    # Samples per bucket (~1.5 s at 44.1 kHz)
+    BUCKET_SHIFT = 16
+
+    def __init__(self, clips):
+        self.clips = sorted((c for c in clips if c.duration > 0), key=lambda c: c.start)
+        self.length = max((c.end for c in self.clips), default=0)
+        self.channels = max((c.channels for c in self.clips), default=1)
+        shift = self.BUCKET_SHIFT
+        buckets = [[] for _ in range((self.length >> shift) + 1)]
+        for clip in self.clips:
+            for j in range(clip.start >> shift, ((clip.end - 1) >> shift) + 1):
+                buckets[j].append(clip)
+        self.buckets = tuple(tuple(bucket) for bucket in buckets)
+
+    def __len__(self):
+        return self.length
+
+    def overlapping(self, start_sample, end_sample):
+        start_sample = max(0, start_sample)
+        end_sample = min(end_sample, self.length)
+        if end_sample <= start_sample:
+            return []
+        shift = self.BUCKET_SHIFT
+        first = start_sample >> shift
+        hits = []
+        for j in range(first, ((end_sample - 1) >> shift) + 1):
+            for clip in self.buckets[j]:
+                # A clip spanning several buckets counts in the first one seen
+                if (
+                    clip.start < end_sample
+                    and clip.end > start_sample
+                    and max(first, clip.start >> shift) == j
+                ):
+                    hits.append(clip)
+        return hits
+
+    # --- Render Every Clip Overlapping a Block Into dest ---
+    # dest is 1-D for mono clip tracks, (channels, frames) otherwise;
+    # mono clips on a multichannel track feed every channel.
+    def read_into(self, dest, start_sample, frames):
+        dest[..., :frames] = 0
+        end_sample = start_sample + frames
+        for clip in self.overlapping(start_sample, end_sample):
+            a = max(start_sample, clip.start)
+            b = min(end_sample, clip.end)
+            src = clip.source[clip.offset + a - clip.start : clip.offset + b - clip.start]
+            if src.ndim == 2:
+                src = src.T
+            gain = clip.gain * clip.scale
+            if gain == 1.0:
+                dest[..., a - start_sample : b - start_sample] += src
+            else:
+                dest[..., a - start_sample : b - start_sample] += src * gain
+
+
+## --- Take: One Recorded Source of a Track and the Files Behind It ---
+#
+# A take is never written again once recorded; re-recording a track whose
+# takes are kept starts a new one. Edit history can therefore share takes
+# between any number of states and only delete the files when released.
+class Take:
+    def __init__(self, track):
+        self.audio_file = track.audio_file
+        self.temporary = track.temporary
+        self.store = track.store
+        self.playback_store = track.playback_store
+        self.peaks = track.peaks
+        self.data = track.data
+        self.scale = track.scale
+        self.channels = track.channels
+        self.fs = track.fs
+        self.take_start = track.take_start
+
+    # --- Identity Shared by Every Capture of the Same Take ---
+    @property
+    def key(self):
+        return self.store.path
+
+    # --- RAM the Take Holds; Memory-mapped Takes Live on Disk and Cost None ---
+    @property
+    def nbytes(self):
+        if self.data is None or isinstance(self.data, np.memmap):
+            return 0
+        return self.data.nbytes
+
+    # --- Point a Track Back at This Take ---
+    def apply(self, track):
+        track.audio_file = self.audio_file
+        track.uid = os.path.splitext(os.path.basename(self.audio_file))[0]
+        track.temporary = self.temporary
+        track.store = self.store
+        track.playback_store = self.playback_store
+        track.peaks = self.peaks
+        track.data = self.data
+        track.scale = self.scale
+        track.channels = self.channels
+        track.fs = self.fs
+        track.take_start = self.take_start
+        track.dirty = True
+        track.unfreeze()
+
+    # --- Delete a Scratch Take's Files (Saved Project Takes Are Kept) ---
+    def discard(self):
+        if not self.temporary:
+            return
+        self.store.remove()
+        self.peaks.remove()
+        PeakIndex(os.path.splitext(self.store.path)[0] + ".peaks").remove()
+        remove_cached(self.store)
+        try:
+            if os.path.exists(self.audio_file):
+                os.remove(self.audio_file)
+        except OSError:
+            pass
+
+
 ## --- AudioTrack: Handles Audio Recording and Playback ---
 class AudioTrack:
     # --- Initialize AudioTrack State ---
-    def __init__(self):
+    def __init__(self, storage="mmap", storage_dtype="float32", path=None):
         self.input_device = None
         self.output_device = None
         self.fs = 44100
         self.channels = 1
-        self.audio_file = os.path.join(
-            tempfile.gettempdir(), f"track_{time.time_ns()}.wav"
-        )
         self.is_recording = False
         self.volume = 1.0
+        self.pan = 0.0
         self.is_muted = False
         self.is_soloed = False
         self.start_time = 0
-        self.q = queue.Queue()
+        self.ring = None
+        self.ring_seconds = 4.0
+        self.flush_frames = 8192
+        self.live_buffer = True
         self.data = None
-        self._live_list = []
+        self.scale = 1.0
+        self.storage = storage
+        self.storage_dtype = storage_dtype
+        self.dirty = False
+        # Mixer rate the take plays back at (None until it joins a mixer)
+        self.session_fs = None
+        self.set_path(path)
+        self._buffer = None
+        self._thread = None
+        self.stats = StreamStats("input")
+        # Input level, measured in the input callback
+        self.meter = MeterBank(1)
+        self.clips = []
+        self.clip_index = None
+        self.take_start = 0
+        self.effects = EffectChain()
+        # (chain version, samples) of the last freeze, None when live
+        self._frozen = None
+        # Set by edit history: replaced takes stay on disk until released
+        self.keep_takes = False
+
+    # --- Point the Track at Its Take Files (Temporary When path Is None) ---
+    def set_path(self, path=None):
+        self.temporary = path is None
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), f"track_{time.time_ns()}.wav")
+        self.audio_file = path
+        self.uid = os.path.splitext(os.path.basename(path))[0]
+        self.store = MappedStore(path, dtype=self.storage_dtype, channels=self.channels)
+        self.playback_store = self.store
+        self.peaks = PeakIndex(os.path.splitext(path)[0] + ".peaks")
 
     # --- Set Input Device and Update Audio Parameters ---
     def set_input_device(self, idx):
@@ -39,28 +235,70 @@ class AudioTrack:
             if idx is None:
                 return
             self.input_device = int(idx)
-            info = sd.query_devices(self.input_device)
-            self.fs = int(info.get("default_samplerate", 44100))
-            self.channels = max(1, int(info.get("max_input_channels", 1)))
+            info = devices.info(self.input_device)
+            self.fs = int(info["default_samplerate"])
+            self.channels = max(1, info["max_input_channels"])
         except:
             self.fs = 44100
 
+    # --- Input Callback: Hand a Block to the Writer Thread ---
+    def feed(self, indata, frames, time_info, status):
+        started = time.perf_counter_ns()
+        self.ring.write(indata)
+        self.meter.decay(frames, self.fs)
+        self.meter.measure(0, indata)
+        self.stats.record(started, frames, self.fs, status)
+
     # --- Start Recording Audio ---
-    def record(self):
+    def record(self, open_stream=True, blocksize=0, latency=None):
         if self.is_recording:
             return
         self.is_recording = True
+        if not self.temporary or self.keep_takes:
+            # Never overwrite a saved or still referenced take
+            self.set_path(None)
+        self.dirty = True
         self.start_time = time.time()
-        self._live_list = []
+        self.store.channels = self.channels
+        if self.playback_store is not self.store:
+            # Live takes write the source rate; conversion happens on load
+            self.playback_store = self.store
+            self.peaks = PeakIndex(os.path.splitext(self.store.path)[0] + ".peaks")
+        self._buffer = (
+            SampleBuffer(capacity=self.fs * 10, channels=self.channels)
+            if self.live_buffer
+            else None
+        )
         self.data = None
-        while not self.q.empty():
-            self.q.get()
+        self.scale = 1.0
+        self.set_clips([])
+        self.unfreeze()
+        self.peaks.reset()
+        self.ring = FrameRing(int(self.fs * self.ring_seconds), self.channels)
+        self.stats.ring = self.ring
 
-        def callback(indata, frames, time_info, status):
-            self.q.put(indata.copy())
+        def _drain(f):
+            ring = self.ring
+            # Keep going after stop until every pending frame is on disk
+            while self.is_recording or ring.pending:
+                if self.is_recording and ring.pending < self.flush_frames:
+                    time.sleep(0.01)
+                    continue
+                # One large write per contiguous region of the ring
+                parts = ring.peek()
+                for part in parts:
+                    f.write(part)
+                    frames = part[:, 0] if self.channels == 1 else part
+                    self.store.write(frames)
+                    self.peaks.append(frames)
+                    if self._buffer is not None:
+                        self._buffer.append(frames)
+                        self.data = self._buffer.view()
+                ring.consume(sum(len(p) for p in parts))
 
         def _task():
             try:
+                self.store.open_writer()
                 with sf.SoundFile(
                     self.audio_file,
                     mode="w",
@@ -68,36 +306,187 @@ class AudioTrack:
                     channels=self.channels,
                     subtype="PCM_16",
                 ) as f:
-                    with sd.InputStream(
+                    if not open_stream:
+                        # Input arrives through feed() from a duplex stream
+                        _drain(f)
+                        return
+                    with devices.stream(
+                        "InputStream",
                         samplerate=self.fs,
                         device=self.input_device,
                         channels=self.channels,
-                        callback=callback,
+                        callback=self.feed,
+                        blocksize=blocksize,
+                        latency=latency,
                     ):
-                        while self.is_recording:
-                            try:
-                                data = self.q.get(timeout=0.2)
-                                f.write(data)
-                                mono = data[:, 0] if data.ndim > 1 else data
-                                self._live_list.append(mono)
-                                self.data = np.concatenate(self._live_list)
-                            except queue.Empty:
-                                continue
+                        _drain(f)
             except:
                 self.is_recording = False
+            finally:
+                self.store.close_writer()
 
-        threading.Thread(target=_task, daemon=True).start()
+        self._thread = threading.Thread(target=_task, daemon=True)
+        self._thread.start()
 
     # --- Stop Recording Audio ---
     def stop_recording(self):
         self.is_recording = False
-        time.sleep(0.2)
-        if os.path.exists(self.audio_file):
-            self.data, _ = sf.read(self.audio_file)
-            if self.data.ndim > 1:
-                self.data = self.data[:, 0]
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.load()
+        self.peaks.save()
+        self._buffer = None
+
+    # --- Load Samples From Disk (Memory-mapped or In-memory) ---
+    def load(self):
+        if self.store.frames == 0 and os.path.exists(self.audio_file):
+            self.store.import_file(self.audio_file)
+        self.channels = self.store.channels
+
+        store = self.store
+        if self.rate != self.fs and store.frames:
+            # Converted once and cached on disk; the callback never resamples
+            store = conform_store(self.store, self.fs, self.rate)
+        if store is not self.playback_store:
+            self.playback_store = store
+            self.peaks = PeakIndex(os.path.splitext(store.path)[0] + ".peaks")
+
+        data = store.map()
+        if data is not None and self.storage != "mmap":
+            data = np.array(data)
+        self.data = data
+        self.scale = self.store.scale
+        self.unfreeze()
+
+        frames = 0 if data is None else len(data)
+        if self.peaks.frames != frames and (
+            not self.peaks.load() or self.peaks.frames != frames
+        ):
+            self.peaks.build(data if data is not None else [], self.scale)
+            self.peaks.save()
+
+    # --- Sample Rate of self.data (the Session Rate Once Conformed) ---
+    @property
+    def rate(self):
+        return self.session_fs or self.fs
+
+    # --- Adopt a Mixer's Rate, Converting the Take If It Differs ---
+    def conform(self, fs):
+        previous = self.rate
+        self.session_fs = fs
+        if self.effects.fs != fs:
+            self.effects.set_rate(fs)
+        if previous != fs and self.data is not None and not self.is_recording:
+            # Clip positions are in playback samples; leave edited tracks alone
+            if not self.clips:
+                self.load()
+
+    @property
+    def length(self):
+        if self.clip_index is not None:
+            return self.clip_index.length
+        return 0 if self.data is None else len(self.data)
+
+    # --- Clip Editing (Metadata Only, Sources Are Never Modified) ---
+    def set_clips(self, clips):
+        self.clips = list(clips)
+        self.clip_index = ClipIndex(self.clips) if self.clips else None
+        self.unfreeze()
+
+    def ensure_clips(self):
+        if not self.clips and self.data is not None:
+            self.set_clips([Clip(self.data, 0, scale=self.scale)])
+        return self.clips
+
+    def add_clip(self, clip):
+        self.set_clips(self.clips + [clip])
+
+    def remove_clip(self, clip):
+        self.set_clips([c for c in self.clips if c is not clip])
+
+    def move_clip(self, clip, start_sample):
+        clip.start = max(0, int(start_sample))
+        self.set_clips(self.clips)
+
+    def split_clip(self, clip, at_sample):
+        left, right = clip.split(at_sample)
+        if right is None:
+            return left, None
+        self.set_clips([c for c in self.clips if c is not clip] + [left, right])
+        return left, right
+
+    def clip_at(self, sample):
+        if self.clip_index is None:
+            return None
+        hits = self.clip_index.overlapping(sample, sample + 1)
+        return hits[-1] if hits else None
+
+    # --- Effect Chain Rendered Offline (None If Unfrozen or Since Edited) ---
+    @property
+    def frozen(self):
+        frozen = self._frozen
+        if frozen is None or frozen[0] != self.effects.version:
+            return None
+        return frozen[1]
+
+    # --- Render the Track Through Its Chain Once; Playback Then Reads It ---
+    def freeze(self, reuse=False, blocksize=65536):
+        source = self.clip_index if self.clip_index is not None else self.data
+        if source is None or not len(self.effects):
+            self.unfreeze()
+            return False
+        version = self.effects.version
+        chain = self.effects.clone()
+        channels = getattr(source, "channels", self.channels)
+        store = MappedStore(cached_path(self.store, "frozen"), "float32", channels)
+        scale = 1.0 if source is self.clip_index else self.scale
+        # Identity gains: the render holds the chain output, pre-fader
+        graph = MixGraph(
+            [source],
+            [np.eye(channels)],
+            outputs=channels,
+            chains=[chain],
+            scales=[scale],
+        )
+
+        fresh = reuse and store.frames == graph.length
+        if fresh and os.path.exists(self.playback_store.path):
+            fresh = os.path.getmtime(store.path) >= os.path.getmtime(
+                self.playback_store.path
+            )
+        if not fresh:
+            target = MappedStore(store.path, "float32", channels)
+            target.path = partial = f"{store.path}.{os.getpid()}.part"
+            block = np.zeros((blocksize, channels), dtype=np.float32)
+            target.open_writer()
+            try:
+                for start in range(0, graph.length, blocksize):
+                    frames = min(blocksize, graph.length - start)
+                    out = block[:frames]
+                    out.fill(0)
+                    graph.mix(out, start, frames)
+                    target.write(out[:, 0] if channels == 1 else out)
+            finally:
+                target.close_writer()
+            os.replace(partial, store.path)
+        self._frozen = (version, store.map())
+        return True
+
+    def unfreeze(self):
+        self._frozen = None
 
     def get_audio_chunk(self, start_sample, num_frames):
+        if self.clip_index is not None:
+            # Clip tracks render to normalized float samples
+            if start_sample >= self.clip_index.length:
+                return None
+            channels = self.clip_index.channels
+            shape = num_frames if channels == 1 else (channels, num_frames)
+            chunk = np.zeros(shape, dtype=np.float32)
+            self.clip_index.read_into(chunk, start_sample, num_frames)
+            return chunk.T
+
         if self.data is None:
             return None
 
@@ -105,9 +494,12 @@ class AudioTrack:
         if start_sample >= len(self.data):
             return None
 
+        # Full blocks are zero-copy slices; only the tail block gets padded
         chunk = self.data[start_sample : min(end_sample, len(self.data))]
         if len(chunk) < num_frames:
-            padding = np.zeros(num_frames - len(chunk))
+            padding = np.zeros(
+                (num_frames - len(chunk),) + chunk.shape[1:], dtype=chunk.dtype
+            )
             chunk = np.concatenate([chunk, padding])
         return chunk
 
@@ -115,11 +507,14 @@ class AudioTrack:
         if self.data is None:
             return
 
+    # --- Current Source as a Shareable Take ---
+    def take(self):
+        return Take(self)
+
     # --- Cleanup Temporary Audio File ---
     def cleanup(self):
         self.is_recording = False
-        try:
-            if os.path.exists(self.audio_file):
-                os.remove(self.audio_file)
-        except:
-            pass
+        take = self.take()
+        self.data = None
+        self.set_clips([])
+        take.discard()
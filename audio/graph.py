@@ -0,0 +1,251 @@
+import numpy as np
+
+
+# --- Number of Channels a Mix Source Provides ---
+def source_channels(src):
+    channels = getattr(src, "channels", None)
+    if channels is not None:
+        return channels
+    return src.shape[1] if src.ndim == 2 else 1
+
+
+# --- Per-channel Output Gains for a Track (Constant-power Pan Law) ---
+def pan_gains(pan, channels, outputs):
+    gains = np.zeros((channels, outputs), dtype=np.float32)
+    pan = max(-1.0, min(1.0, pan))
+    if outputs == 1:
+        gains[:, 0] = 1.0 / channels
+    elif channels == 1:
+        theta = (pan + 1) * np.pi / 4
+        gains[0, 0] = np.cos(theta)
+        gains[0, 1] = np.sin(theta)
+    else:
+        # Multichannel sources: alternate channels onto L/R and balance them
+        left, right = min(1.0, 1.0 - pan), min(1.0, 1.0 + pan)
+        for ch in range(channels):
+            out = ch % outputs
+            gains[ch, out] = left if out == 0 else right if out == 1 else 1.0
+    return gains
+
+
+## --- MixGraph: Immutable Mix Snapshot Swapped Into the Audio Thread ---
+#
+# The UI compiles a new graph whenever tracks, volumes, pan or mute/solo
+# change. The audio thread only reads the graph it picked up at the
+# start of a block, so it never scans track flags or races the UI.
+# Every source channel is one row of a scratch matrix, and the whole
+# block is mixed to the output bus with a single gain-matrix product.
+# Tracks with inserts run their effect chain over their rows in between;
+# chains belong to the tracks, so filter state survives graph swaps.
+class MixGraph:
+    def __init__(
+        self,
+        sources,
+        gains,
+        track_ids=(),
+        outputs=2,
+        chains=None,
+        scales=None,
+        levels=None,
+    ):
+        self.sources = tuple(sources)
+        self.outputs = outputs
+        # Per source: effect chain (or None) and the scale applied before it
+        self.chains = tuple(chains or (None,) * len(self.sources))
+        self.scales = tuple(scales or (1.0,) * len(self.sources))
+        # Sources that render themselves (disk streams, clip indexes)
+        self.readers = tuple(hasattr(s, "read_into") for s in self.sources)
+        self.channels = tuple(source_channels(s) for s in self.sources)
+        edges = np.cumsum((0,) + self.channels)
+        self.rows = tuple(zip(edges[:-1].tolist(), edges[1:].tolist()))
+        self.row_count = int(edges[-1])
+
+        if gains:
+            self.gains = np.ascontiguousarray(np.vstack(gains), dtype=np.float32)
+        else:
+            self.gains = np.zeros((0, outputs), dtype=np.float32)
+        self._gains_t = np.ascontiguousarray(self.gains.T)
+
+        self.track_ids = np.asarray(track_ids, dtype=np.int64)
+        # Metering: slot 0 is the master, track i meters into slot i + 1.
+        # A graph folds one run of slots, its first track to its last;
+        # tracks muted in between get zeros, which leave their meters be.
+        first = int(self.track_ids[0]) if len(self.track_ids) else 0
+        self._meter_first = first + 1
+        positions = self.track_ids - first
+        span = int(positions[-1]) + 1 if len(self.track_ids) else 0
+        self._gapped = span != len(self.track_ids)
+        # Fader gain per source (volume, plus any folded sample scale): track
+        # meters read post-fader but before the pan law
+        self.levels = tuple(levels or (1.0,) * len(self.sources))
+        # Per source: block peak and sum of squares, then scaled in place to
+        # post-fader peak and RMS-weighted mean square. The extra column
+        # stays zero; the gathers below read it for slots with no signal.
+        count = len(self.sources)
+        self._stats = np.zeros((2, count + 1), dtype=np.float32)
+        self._stat_scale = np.ones_like(self._stats)
+        self._peaks, self._squares = self._stats[:, :-1]
+        # A source's rows are adjacent in scratch, so with one channel count
+        # scratch reads as one row per source. Mixed counts reduce per row,
+        # then gather each source's rows into a zero-padded table.
+        self._uniform = len(set(self.channels)) <= 1
+        self._row_stats = self._stats
+        if not self._uniform:
+            width = max(self.channels)
+            self._row_stats = np.zeros((2, self.row_count + 1), dtype=np.float32)
+            table = np.full((count, width), self.row_count)
+            for i, (r0, r1) in enumerate(self.rows):
+                table[i, : r1 - r0] = np.arange(r0, r1)
+            self._pad_rows = table.reshape(-1)
+            pad = np.zeros((2, count, width), dtype=np.float32)
+            self._pad = pad.reshape(2, -1)
+            self._pad_peaks, self._pad_squares = pad
+        self._row_peaks, self._row_squares = self._row_stats[:, :-1]
+        # Gapped graphs gather their sources into the slots they span
+        self._spread = self._stats
+        if self._gapped:
+            self._spread_sources = np.full(span, count)
+            self._spread_sources[positions] = np.arange(count)
+            self._spread = np.zeros((2, span), dtype=np.float32)
+        self._scaled_for = None
+        # Bank rows this graph folds into, bound on first use
+        self._bank = None
+        self._bound = None
+        self.lengths = tuple(len(s) for s in self.sources)
+        # Effect tails (echoes, releases) keep sounding past the source end
+        tails = tuple(c.tail() if c else 0 for c in self.chains)
+        self.length = max(map(sum, zip(self.lengths, tails)), default=0)
+        self._scratch = np.zeros((self.row_count, 0), dtype=np.float32)
+        self._abs = self._scratch
+        self._meter_rows = self._abs
+        self._sum = np.zeros((outputs, 0), dtype=np.float32)
+
+    # --- Resolve Volume / Pan / Mute / Solo Into a Gain Matrix ---
+    # fresh_effects gives each chain its own state (offline renders), so
+    # the live chains are never advanced outside the audio thread.
+    @classmethod
+    def compile(cls, tracks, prefetcher=None, outputs=2, fresh_effects=False):
+        any_solo = any(t.is_soloed for t in tracks)
+        sources, gains, track_ids, chains, scales, levels = [], [], [], [], [], []
+        for i, track in enumerate(tracks):
+            if track.length == 0:
+                continue
+            if track.is_muted or (any_solo and not track.is_soloed):
+                continue
+            if track.volume == 0:
+                continue
+            frozen = track.frozen
+            scale = 1.0
+            if frozen is not None:
+                # Chain already rendered offline: plain playback
+                source = frozen
+            elif track.clip_index is not None:
+                # Clips carry their own source scale
+                source = track.clip_index
+            else:
+                stream = prefetcher.stream_for(track) if prefetcher else None
+                source = track.data if stream is None else stream
+                scale = track.scale
+            chain = None
+            if frozen is None and len(track.effects):
+                chain = track.effects.clone() if fresh_effects else track.effects
+            gain = track.volume
+            if chain is None:
+                # No inserts: fold the sample scale into the gain matrix
+                gain, scale = gain * scale, 1.0
+            sources.append(source)
+            gains.append(gain * pan_gains(track.pan, source_channels(source), outputs))
+            track_ids.append(i)
+            chains.append(chain)
+            scales.append(scale)
+            levels.append(gain)
+        return cls(sources, gains, track_ids, outputs, chains, scales, levels)
+
+    def __len__(self):
+        return len(self.sources)
+
+    # --- Gather Source Channels Into a Matrix, Mix With One Product ---
+    def mix(self, out, start_sample, frames, meters=None):
+        if not self.sources or start_sample >= self.length:
+            return
+
+        if self._scratch.shape[1] != frames:
+            # Only happens when the block size changes
+            self._scratch = np.zeros((self.row_count, frames), dtype=np.float32)
+            self._abs = np.zeros_like(self._scratch)
+            self._sum = np.zeros((self.outputs, frames), dtype=np.float32)
+            self._meter_rows = self._abs
+            if self._uniform:
+                self._meter_rows = self._abs.reshape(len(self.sources), -1)
+        scratch = self._scratch
+
+        for i, src in enumerate(self.sources):
+            r0, r1 = self.rows[i]
+            rows = scratch[r0] if r1 - r0 == 1 else scratch[r0:r1]
+            self._read(i, src, rows, start_sample, frames)
+            chain = self.chains[i]
+            if chain is not None:
+                if self.scales[i] != 1.0:
+                    rows *= self.scales[i]
+                # Chains always see (channels, frames), even for mono
+                chain.process(scratch[r0:r1])
+
+        if meters is not None:
+            self._meter(meters, scratch, frames)
+        np.dot(self._gains_t, scratch, out=self._sum)
+        out[:frames] += self._sum.T
+
+    # --- Post-fader (Pre-pan) Peak / Mean Square per Track ---
+    # Everything lands in buffers sized at compile / block-size change, so
+    # metering allocates nothing per block.
+    def _meter(self, meters, scratch, frames):
+        work, rows = self._abs, self._meter_rows
+        np.abs(scratch, out=work)
+        np.maximum.reduce(rows, axis=1, out=self._row_peaks)
+        np.square(work, out=work)
+        np.add.reduce(rows, axis=1, out=self._row_squares)
+        if not self._uniform:
+            # Missing channels read zero: no effect on a max of |x| or a sum
+            pad_rows = self._pad_rows
+            np.take(self._row_stats, pad_rows, axis=1, out=self._pad, mode="clip")
+            np.maximum.reduce(self._pad_peaks, axis=1, out=self._peaks)
+            np.add.reduce(self._pad_squares, axis=1, out=self._squares)
+
+        if self._scaled_for != (frames, meters.weight):
+            level = np.asarray(self.levels, dtype=np.float32)
+            samples = np.asarray(self.channels, dtype=np.float32) * frames
+            self._stat_scale[0, :-1] = level
+            self._stat_scale[1, :-1] = level * level * meters.weight / samples
+            self._scaled_for = (frames, meters.weight)
+        np.multiply(self._stats, self._stat_scale, out=self._stats)
+
+        if self._gapped:
+            sources = self._spread_sources
+            np.take(self._stats, sources, axis=1, out=self._spread, mode="clip")
+        if self._bank is not meters:
+            self._bind(meters)
+        if self._bound is not None:
+            meters.fold(*self._bound)
+
+    def _bind(self, meters):
+        # More tracks than meter slots: the extra tracks go unmetered
+        first = self._meter_first
+        n = min(self._spread.shape[1], meters.slots - first)
+        self._bound = None
+        if n > 0:
+            rows = meters.rows(slice(first, first + n))
+            self._bound = (rows, self._spread[0, :n], self._spread[1, :n])
+        self._bank = meters
+
+    def _read(self, i, src, rows, start_sample, frames):
+        if self.readers[i]:
+            src.read_into(rows, start_sample, frames)
+            return
+        n = min(frames, self.lengths[i] - start_sample)
+        if n <= 0:
+            rows[...] = 0
+            return
+        block = src[start_sample : start_sample + n]
+        rows[..., :n] = block.T if src.ndim == 2 else block
+        if n < frames:
+            rows[..., n:] = 0
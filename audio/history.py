@@ -0,0 +1,159 @@
+import os
+from audio.engine import Clip
+
+# Rough bookkeeping cost of one captured track / clip, in bytes
+TRACK_BYTES = 256
+CLIP_BYTES = 128
+
+
+## --- TrackState: Immutable Snapshot of One Track's Edit State ---
+#
+# Holds the take by reference and clips as plain tuples, so capturing and
+# restoring cost O(clips) no matter how long the audio is.
+class TrackState:
+    def __init__(self, track, take):
+        self.track = track
+        self.take = take
+        self.clips = tuple(
+            (c.source, c.start, c.offset, c.duration, c.gain, c.scale)
+            for c in track.clips
+        )
+        self.volume = track.volume
+        self.pan = track.pan
+        self.muted = track.is_muted
+        self.soloed = track.is_soloed
+
+    @property
+    def nbytes(self):
+        return TRACK_BYTES + CLIP_BYTES * len(self.clips)
+
+    def restore(self):
+        track = self.track
+        if track.take().key != self.take.key:
+            self.take.apply(track)
+        track.volume = self.volume
+        track.pan = self.pan
+        track.is_muted = self.muted
+        track.is_soloed = self.soloed
+        track.set_clips(Clip(*clip) for clip in self.clips)
+
+
+## --- EditHistory: Undo / Redo Over Shared, Reference-counted Takes ---
+#
+# Every commit stores only metadata; takes are shared between states and
+# counted. A take no state references any more is released, and scratch
+# takes have their files deleted then. States beyond the memory budget
+# (metadata plus in-RAM takes that only history keeps alive; mapped takes
+# stay on disk) are evicted oldest first, so the current state survives.
+class EditHistory:
+    def __init__(self, budget_bytes=64 << 20):
+        self.budget_bytes = budget_bytes
+        # (label, tuple of TrackState); states[cursor] is the live state
+        self.states = []
+        self.cursor = -1
+        self.bytes = 0
+        # take key -> [take, number of states referencing it]
+        self._takes = {}
+
+    @property
+    def can_undo(self):
+        return self.cursor > 0
+
+    @property
+    def can_redo(self):
+        return self.cursor < len(self.states) - 1
+
+    # --- Record the State After an Edit (Drops Anything Redoable) ---
+    def commit(self, tracks, label="edit"):
+        state = tuple(self._capture(track) for track in tracks)
+        while self.can_redo:
+            self._release(self.states.pop()[1])
+        self.states.append((label, state))
+        self.cursor = len(self.states) - 1
+        self._evict()
+        return state
+
+    # --- Step Back / Forward; Returns the Restored Track List or None ---
+    def undo(self):
+        if not self.can_undo:
+            return None
+        self.cursor -= 1
+        return self._restore(self.states[self.cursor][1])
+
+    def redo(self):
+        if not self.can_redo:
+            return None
+        self.cursor += 1
+        return self._restore(self.states[self.cursor][1])
+
+    # --- Label of the Edit an Undo / Redo Would Revert / Reapply ---
+    def undo_label(self):
+        return self.states[self.cursor][0] if self.can_undo else None
+
+    def redo_label(self):
+        return self.states[self.cursor + 1][0] if self.can_redo else None
+
+    # --- Uids of Every Take a State Still References (Kept on Save) ---
+    def uids(self):
+        return {
+            os.path.splitext(os.path.basename(ts.take.audio_file))[0]
+            for _, state in self.states
+            for ts in state
+        }
+
+    # --- Forget Everything but the Live State ---
+    def clear(self):
+        if not self.states:
+            return
+        live = self.states[self.cursor]
+        for i, (_, state) in enumerate(self.states):
+            if i != self.cursor:
+                self._release(state)
+        self.states = [live]
+        self.cursor = 0
+        self.bytes = self._measure()
+
+    def _capture(self, track):
+        # Re-recording must start a new take while history refers to this one
+        track.keep_takes = True
+        take = track.take()
+        if take.data is not None:
+            entry = self._takes.get(take.key)
+            if entry is None:
+                entry = self._takes[take.key] = [take, 0]
+            else:
+                # Share the first capture so every state holds the same object
+                take = entry[0]
+            entry[1] += 1
+        return TrackState(track, take)
+
+    def _release(self, state):
+        for track_state in state:
+            entry = self._takes.get(track_state.take.key)
+            if entry is None or entry[0] is not track_state.take:
+                continue
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._takes[track_state.take.key]
+                entry[0].discard()
+
+    def _restore(self, state):
+        for track_state in state:
+            track_state.restore()
+        return [track_state.track for track_state in state]
+
+    # --- Metadata of Every State Plus Takes the Live State Does Not Use ---
+    def _measure(self):
+        live = {ts.take.key for ts in self.states[self.cursor][1]}
+        pinned = sum(
+            take.nbytes for key, (take, _) in self._takes.items() if key not in live
+        )
+        meta = sum(ts.nbytes for _, state in self.states for ts in state)
+        return meta + pinned
+
+    def _evict(self):
+        self.bytes = self._measure()
+        while self.bytes > self.budget_bytes and self.cursor > 0:
+            self._release(self.states.pop(0)[1])
+            self.cursor -= 1
+            self.bytes = self._measure()
@@ -0,0 +1,53 @@
+import threading
+import numpy as np
+
+
+## --- LatencyProbe: Loopback Round-trip Measurement Through a Duplex Stream ---
+#
+# Plays a short windowed chirp, captures the input over the same
+# callbacks and finds the delay by FFT cross-correlation. Needs the
+# output to reach the input (loopback cable or speaker into mic).
+class LatencyProbe:
+    def __init__(self, fs=44100, seconds=1.0, level=0.5, min_confidence=8.0):
+        self.fs = fs
+        self.min_confidence = min_confidence
+        length = int(fs * seconds)
+
+        n = 2048
+        t = np.arange(n) / fs
+        f0, f1 = 1000.0, 8000.0
+        sweep = np.sin(2 * np.pi * (f0 * t + (f1 - f0) / (2 * t[-1]) * t * t))
+        self.burst = (level * np.hanning(n) * sweep).astype(np.float32)
+
+        self.onset = fs // 10
+        self.signal = np.zeros(length, dtype=np.float32)
+        self.signal[self.onset : self.onset + n] = self.burst
+        self.captured = np.zeros(length, dtype=np.float32)
+        self.pos = 0
+        self.done = threading.Event()
+        self.confidence = 0.0
+
+    # --- Duplex Callback: Play the Test Signal, Record What Comes Back ---
+    def callback(self, indata, outdata, frames, time, status):
+        outdata.fill(0)
+        n = min(frames, len(self.signal) - self.pos)
+        if n > 0:
+            outdata[:n, 0] = self.signal[self.pos : self.pos + n]
+            self.captured[self.pos : self.pos + n] = indata[:n, 0]
+            self.pos += n
+        if self.pos >= len(self.signal):
+            self.done.set()
+
+    # --- Round-trip Delay in Samples (None If the Burst Was Not Found) ---
+    def estimate(self):
+        size = 1 << int(np.ceil(np.log2(len(self.captured) + len(self.signal))))
+        spectrum = np.fft.rfft(self.captured, size) * np.conj(
+            np.fft.rfft(self.signal, size)
+        )
+        corr = np.abs(np.fft.irfft(spectrum, size)[: len(self.captured)])
+        lag = int(np.argmax(corr))
+        noise = float(np.median(corr)) + 1e-12
+        self.confidence = float(corr[lag]) / noise
+        if self.confidence < self.min_confidence:
+            return None
+        return lag
@@ -0,0 +1,100 @@
+import numpy as np
+
+# Peak meter fall rate and RMS integration time (typical PPM / VU feel)
+FALL_DB_PER_SECOND = 20.0
+RMS_SECONDS = 0.3
+
+# Track meters per mixer; slot 0 is the master bus
+TRACK_METERS = 512
+
+
+## --- MeterBank: Peak / RMS / Clip Levels for a Fixed Set of Meter Slots ---
+#
+# values[:, slot] = (peak, mean square, clipped blocks). The audio thread
+# decays every slot once per block and folds in the block's levels with
+# in-place array operations; the bank never grows, allocates or locks.
+# Readers copy single slots and may see one block older than the writer,
+# which is fine for meters. The array can also live in shared memory.
+class MeterBank:
+    COLUMNS = 3
+
+    def __init__(self, slots, values=None):
+        self.slots = slots
+        if values is None:
+            values = np.zeros((self.COLUMNS, slots), dtype=np.float64)
+        self.values = values
+        self._levels = values[:2]
+        self._peak, self._square, self._clips = values
+        self._block = (0, 0)
+        # Per-block decay of the peak and mean-square rows, spelled out per
+        # slot: a broadcast operand would make the ufunc buffer every block
+        self._decay = np.ones((2, slots))
+        # |block| scratch for measure, sized to the last block seen
+        self._abs = np.zeros(0, dtype=np.float32)
+        # Share of a block's mean square in the running RMS (see fold)
+        self.weight = 0.0
+
+    def reset(self):
+        self.values[:] = 0
+
+    # --- Clip Indicators Stay Lit Until Cleared (Transport Start) ---
+    def clear_clips(self):
+        self.values[2] = 0
+
+    # --- Drop Levels at Once (No Callback Is Left to Decay Them) ---
+    def silence(self):
+        self.values[:2] = 0
+
+    # --- Ballistics for One Block (Audio Thread) ---
+    def decay(self, frames, fs):
+        if self._block != (frames, fs):
+            fall = 10 ** (-FALL_DB_PER_SECOND * frames / fs / 20)
+            keep = np.exp(-frames / (fs * RMS_SECONDS))
+            self._decay[0] = fall
+            self._decay[1] = keep
+            self.weight = 1 - keep
+            self._block = (frames, fs)
+        np.multiply(self._levels, self._decay, out=self._levels)
+
+    # --- Writable (peak, mean square, clips) Views of a Slot Range ---
+    # A graph binds these once and folds every block into them.
+    def rows(self, slots):
+        return self.values[0, slots], self.values[1, slots], self.values[2, slots]
+
+    # --- Fold Block Levels Into Bound Rows (After decay, No Allocation) ---
+    # squares are mean squares already multiplied by self.weight
+    @staticmethod
+    def fold(rows, peaks, squares):
+        peak, square, clips = rows
+        np.maximum(peak, peaks, out=peak)
+        np.add(square, squares, out=square)
+        if np.maximum.reduce(peaks) >= 1.0:
+            clips += peaks >= 1.0
+
+    # --- Levels of a Whole (frames, channels) Block Into One Slot ---
+    def measure(self, slot, block):
+        if block.size == 0:
+            return
+        flat = block.reshape(-1)
+        if self._abs.shape != flat.shape or self._abs.dtype != flat.dtype:
+            self._abs = np.zeros_like(flat)
+        peak = float(np.maximum.reduce(np.abs(flat, out=self._abs)))
+        if peak > self._peak[slot]:
+            self._peak[slot] = peak
+        self._square[slot] += self.weight * float(flat.dot(flat)) / flat.size
+        if peak >= 1.0:
+            self._clips[slot] += 1
+
+    # --- (peak, rms, clipped) of One Slot, Linear Amplitude ---
+    def read(self, slot):
+        if slot is None or slot >= self.slots:
+            return 0.0, 0.0, 0
+        peak, square, clips = self.values[:, slot]
+        return float(peak), float(np.sqrt(max(square, 0.0))), int(clips)
+
+
+# --- Linear Level to Decibels Full Scale (Floored for Display) ---
+def to_db(level, floor=-60.0):
+    if level <= 0:
+        return floor
+    return max(floor, 20 * np.log10(level))
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+## --- Metronome: Pre-rendered Click Pattern Mixed by Slicing ---
+class Metronome:
+    CLICK_LEN = 800
+    ACCENT_FREQ = 880
+    BEAT_FREQ = 440
+
+    def __init__(self, fs=44100, bpm=120, beats_per_bar=4, subdivision=1):
+        self.fs = fs
+        self.bpm = bpm
+        self.beats_per_bar = beats_per_bar
+        self.subdivision = subdivision
+        self.level = 0.1
+        self.counter = 0
+        self._bar = np.zeros(1, dtype=np.float32)
+        self.rebuild()
+
+    @property
+    def samples_per_beat(self):
+        return int((self.fs * 60) / self.bpm)
+
+    @property
+    def current_beat(self):
+        return (self.counter % len(self._bar)) // self.samples_per_beat
+
+    # --- Render a Single Click Wavetable ---
+    def _click(self, freq, gain, length):
+        t = np.arange(length) / self.fs
+        env = np.linspace(1.0, 0.0, length)
+        return (gain * env * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+    # --- Rebuild the One-Bar Click Loop (Tempo / Rate / Meter Changes) ---
+    def rebuild(self):
+        ticks = self.beats_per_bar * self.subdivision
+        bar_len = self.samples_per_beat * self.beats_per_bar
+        length = max(1, min(self.CLICK_LEN, bar_len // ticks))
+
+        accent = self._click(self.ACCENT_FREQ, self.level, length)
+        normal = self._click(self.BEAT_FREQ, self.level, length)
+        sub = self._click(self.BEAT_FREQ, self.level * 0.5, length)
+
+        bar = np.zeros(bar_len, dtype=np.float32)
+        for k in range(ticks):
+            onset = (k * bar_len) // ticks
+            if k == 0:
+                table = accent
+            elif k % self.subdivision == 0:
+                table = normal
+            else:
+                table = sub
+            bar[onset : onset + length] += table
+
+        # Single reference swap so the audio thread never sees a partial bar
+        self._bar = bar
+
+    def set_tempo(self, bpm):
+        if bpm != self.bpm:
+            self.bpm = bpm
+            self.rebuild()
+
+    def set_samplerate(self, fs):
+        if fs != self.fs:
+            self.fs = fs
+            self.rebuild()
+
+    def set_time_signature(self, beats_per_bar, subdivision=1):
+        self.beats_per_bar = max(1, int(beats_per_bar))
+        self.subdivision = max(1, int(subdivision))
+        self.rebuild()
+
+    def reset(self):
+        self.counter = 0
+
+    # --- Mix the Click Loop Into an Output Buffer ---
+    def mix(self, out, frames):
+        bar = self._bar
+        bar_len = len(bar)
+        pos = self.counter % bar_len
+        done = 0
+        while done < frames:
+            take = min(frames - done, bar_len - pos)
+            click = bar[pos : pos + take]
+            # Same click on every output channel
+            out[done : done + take] += click[:, None] if out.ndim == 2 else click
+            done += take
+            pos = 0
+        self.counter += frames
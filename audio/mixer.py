@@ -1,79 +1,303 @@
-import numpy as np
-import sounddevice as sd
+from time import monotonic, perf_counter_ns
+from audio.devices import devices
+from audio.metronome import Metronome
+from audio.graph import MixGraph
+from audio.stream import Prefetcher, TrackStream
+from audio.telemetry import StreamStats
+from audio.engine import Clip
+from audio.latency import LatencyProbe
+from audio.meters import TRACK_METERS, MeterBank
+from audio.profiles import PROFILES, BlockTuner
 
 
 class Mixer:
-    def __init__(self, fs=44100):
+    def __init__(self, fs=44100, channels=2):
         self.fs = fs
-        self.bpm = 120
+        self.channels = channels
+        self.metronome = Metronome(fs=fs, bpm=120)
         self.is_playing = False
         self.current_sample = 0
         self.tracks = []
         self.metronome_enabled = False
         self.output_device = None
         self._stream = None
-        self.metro_counter = 0
+        self.stats = StreamStats("output")
+        # Written by the audio thread, polled by the UI
+        self.meters = MeterBank(TRACK_METERS + 1)
+        self._meter_slots = {}
+        self.prefetcher = None
+        self._graph = MixGraph.compile([], outputs=channels)
+        self.latency_samples = 0
+        self.latency_measured = False
+        self.overdub_track = None
+        self.capture_start = None
+        self.profile = "balanced"
+        self.blocksize = PROFILES["balanced"]["blocksize"]
+        self.latency = PROFILES["balanced"]["latency"]
+        self.tuner = None
+
+    @property
+    def bpm(self):
+        return self.metronome.bpm
+
+    @bpm.setter
+    def bpm(self, value):
+        self.metronome.set_tempo(value)
 
     @property
     def samples_per_beat(self):
-        return int((self.fs * 60) / self.bpm)
+        return self.metronome.samples_per_beat
 
     def audio_callback(self, outdata, frames, time, status):
+        started = perf_counter_ns()
         outdata.fill(0)
+        self.meters.decay(frames, self.fs)
 
         if self.metronome_enabled:
-            for i in range(frames):
-                pos = (self.metro_counter + i) % self.samples_per_beat
-                if pos < 800:
-                    t = pos / self.fs
-                    freq = (
-                        880
-                        if ((self.metro_counter + i) // self.samples_per_beat) % 4 == 0
-                        else 440
-                    )
-                    outdata[i, 0] += 0.1 * np.sin(2 * np.pi * freq * t)
-            self.metro_counter += frames
+            self.metronome.mix(outdata, frames)
 
         if self.is_playing:
-            any_solo = any(t.is_soloed for t in self.tracks)
-            for track in self.tracks:
-                chunk = track.get_audio_chunk(self.current_sample, frames)
-                if chunk is not None:
-                    if any_solo:
-                        vol = (
-                            track.volume
-                            if track.is_soloed and not track.is_muted
-                            else 0
-                        )
-                    else:
-                        vol = track.volume if not track.is_muted else 0
-                    outdata[: len(chunk), 0] += chunk * vol
+            self.mix_tracks(outdata, self.current_sample, frames, meters=self.meters)
             self.current_sample += frames
 
+        self.meters.measure(0, outdata)
+        self.stats.record(started, frames, self.fs, status)
+
+    # --- Mix Track Audio Into a Block (Shared by Live and Offline Paths) ---
+    def mix_tracks(self, outdata, start_sample, frames, graph=None, meters=None):
+        graph = self._graph if graph is None else graph
+        graph.mix(outdata, start_sample, frames, meters)
+
+    # --- Compile a Fresh Mix Graph From the Current Track State ---
+    # streaming=False is the offline path: memory maps and private effect state
+    def compile(self, streaming=True):
+        prefetcher = self.prefetcher if streaming else None
+        return MixGraph.compile(
+            list(self.tracks), prefetcher, self.channels, fresh_effects=not streaming
+        )
+
+    # --- Recompile and Swap the Graph Into the Audio Thread ---
+    def update(self):
+        graph = self.compile()
+        self._graph = graph
+        self._meter_slots = {id(t): i + 1 for i, t in enumerate(self.tracks)}
+        if self.prefetcher:
+            self.prefetcher.retain(
+                s for s in graph.sources if isinstance(s, TrackStream)
+            )
+
+    # --- Stream Tracks From Disk Through Read-ahead Buffers ---
+    def enable_streaming(self, depth_seconds=4.0):
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher(fs=self.fs, depth_seconds=depth_seconds)
+            self.prefetcher.seek(self.current_sample)
+        self.update()
+
+    def disable_streaming(self):
+        prefetcher, self.prefetcher = self.prefetcher, None
+        self.update()
+        if prefetcher:
+            prefetcher.stop()
+
+    @property
+    def streaming(self):
+        return self.prefetcher is not None
+
+    # --- Record a Take on Its Own Input Stream ---
+    def record_track(self, track):
+        track.record(**self.stream_settings())
+
+    def stop_track(self, track):
+        track.stop_recording()
+        return track
+
+    def seek(self, sample):
+        self.current_sample = max(0, int(sample))
+        if self.prefetcher:
+            self.prefetcher.seek(self.current_sample)
+        # Echoes and filter memory from the old position would bleed in
+        for track in self.tracks:
+            track.effects.reset()
+
+    def set_tracks(self, tracks):
+        tracks = list(tracks)
+        for track in tracks:
+            track.conform(self.fs)
+        self.tracks = tracks
+        self.update()
+
+    def add_track(self, track):
+        track.conform(self.fs)
+        if track not in self.tracks:
+            self.tracks = self.tracks + [track]
+        self.update()
+
+    def remove_track(self, track):
+        self.tracks = [t for t in self.tracks if t is not track]
+        self.update()
+
+    @property
+    def length(self):
+        return self._graph.length
+
+    # --- Block Size and Device Latency Shared by Every Stream We Open ---
+    def stream_settings(self):
+        return {"blocksize": self.blocksize, "latency": self.latency}
+
+    # --- Pick a Latency Profile ("auto" Tunes the Block Size Live) ---
+    def set_profile(self, name):
+        if name == "auto":
+            base = PROFILES["balanced"]
+            self.tuner = BlockTuner(base["blocksize"])
+        else:
+            base = PROFILES[name]
+            self.tuner = None
+        self.profile = name
+        self.latency = base["latency"]
+        self.set_blocksize(base["blocksize"])
+
+    def set_blocksize(self, blocksize):
+        if blocksize == self.blocksize:
+            return
+        self.blocksize = blocksize
+        # Reopen a running output stream; duplex takes keep their stream
+        if self._stream is not None and self.overdub_track is None:
+            self.close_stream()
+            self.ensure_stream()
+
+    # --- Feed Auto-tune With Callback Load and Xruns (UI Thread, ~1 Hz) ---
+    def tune(self):
+        if self.tuner is None or self._stream is None or self.overdub_track:
+            return None
+        if not self.stats.callbacks:
+            return None
+        blocksize = self.tuner.observe(self.stats, monotonic())
+        if blocksize is not None:
+            self.set_blocksize(blocksize)
+            # Fresh counters so the new size is judged on its own
+            self.stats.reset()
+        return blocksize
+
+    # Streams open through the device registry, which imports sounddevice
+    # only then, so headless renders work on machines without PortAudio
     def ensure_stream(self):
         if self._stream is None or not self._stream.active:
             if self._stream:
-                self._stream.close()
-            self._stream = sd.OutputStream(
+                devices.close_stream(self._stream)
+            self._stream = devices.open_stream(
+                "OutputStream",
                 samplerate=self.fs,
                 device=self.output_device,
-                channels=1,
+                channels=self.channels,
                 callback=self.audio_callback,
+                **self.stream_settings(),
             )
             self._stream.start()
 
+    def close_stream(self):
+        if self._stream:
+            devices.close_stream(self._stream)
+            self._stream = None
+
+    # --- Duplex Callback: Capture and Playback Share One Sample Clock ---
+    def duplex_callback(self, indata, outdata, frames, time, status):
+        track = self.overdub_track
+        if track is not None and track.is_recording:
+            if self.capture_start is None:
+                self.capture_start = self.current_sample
+            track.feed(indata, frames, time, status)
+        self.audio_callback(outdata, frames, time, status)
+
+    # --- Record a Take While Playing the Session Through One Duplex Stream ---
+    def start_overdub(self, track):
+        self.close_stream()
+        track.fs = self.fs
+        self.overdub_track = track
+        self.capture_start = None
+        track.record(open_stream=False)
+
+        self.seek(0)
+        self.is_playing = True
+        self._stream = devices.open_stream(
+            "Stream",
+            samplerate=self.fs,
+            device=(track.input_device, self.output_device),
+            channels=(track.channels, self.channels),
+            callback=self.duplex_callback,
+            **self.stream_settings(),
+        )
+        self._stream.start()
+
+    # --- Finish the Take and Place It at Its Latency-compensated Start ---
+    def stop_overdub(self):
+        track = self.overdub_track
+        if track is None:
+            return None
+        self.close_stream()
+        self.overdub_track = None
+        track.stop_recording()
+        self.is_playing = False
+
+        if track.data is not None:
+            # Input heard at playback sample s arrives latency_samples later
+            start = (self.capture_start or 0) - self.latency_samples
+            offset = max(0, -start)
+            track.take_start = start
+            track.set_clips(
+                [Clip(track.data, max(0, start), offset, scale=track.scale)]
+            )
+        self.add_track(track)
+        return track
+
+    # --- Measure Round-trip Latency With a Loopback Test Signal ---
+    def measure_latency(self, input_device=None, timeout=3.0):
+        self.close_stream()
+        probe = LatencyProbe(self.fs)
+        with devices.stream(
+            "Stream",
+            samplerate=self.fs,
+            device=(input_device, self.output_device),
+            channels=(1, 1),
+            callback=probe.callback,
+            **self.stream_settings(),
+        ) as stream:
+            probe.done.wait(timeout)
+            reported = stream.latency
+
+        lag = probe.estimate()
+        self.latency_measured = lag is not None
+        if lag is None:
+            # No loopback found: fall back to what the driver reports
+            if isinstance(reported, (tuple, list)):
+                reported = sum(reported)
+            else:
+                reported = reported * 2
+            lag = int(round(reported * self.fs))
+        self.latency_samples = lag
+        return lag
+
+    # --- (peak, rms, clipped blocks) for a Track: Its Input While Recording ---
+    def track_meter(self, track):
+        if track.is_recording:
+            return track.meter.read(0)
+        return self.meters.read(self._meter_slots.get(id(track)))
+
+    def master_meter(self):
+        return self.meters.read(0)
+
     def start_transport(self):
-        self.current_sample = 0
+        self.meters.clear_clips()
+        self.seek(0)
         self.is_playing = True
         self.ensure_stream()
 
     def stop_transport(self):
         self.is_playing = False
         self.current_sample = 0
+        self.meters.silence()
 
     def stop(self):
         self.stop_transport()
-        if self._stream:
-            self._stream.stop()
-            self._stream.close()
-            self._stream = None
+        if self.prefetcher:
+            self.disable_streaming()
+        self.close_stream()
@@ -0,0 +1,174 @@
+import os
+import numpy as np
+from audio.buffer import SampleBuffer
+
+
+## --- PeakLevel: Min/Max Pairs for One Resolution of the Pyramid ---
+class PeakLevel:
+    def __init__(self, bin_size, capacity=1024):
+        self.bin_size = bin_size
+        self.mins = SampleBuffer(capacity=capacity)
+        self.maxs = SampleBuffer(capacity=capacity)
+
+    def __len__(self):
+        return min(len(self.mins), len(self.maxs))
+
+    def append(self, mins, maxs):
+        self.mins.append(mins)
+        self.maxs.append(maxs)
+
+
+## --- PeakIndex: Incremental Waveform Mipmaps for a Track ---
+class PeakIndex:
+    BASE_BIN = 256
+
+    def __init__(self, path=None):
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        self.levels = [PeakLevel(self.BASE_BIN)]
+        self.frames = 0
+        self._tail_lo = np.zeros(self.BASE_BIN, dtype=np.float32)
+        self._tail_hi = np.zeros(self.BASE_BIN, dtype=np.float32)
+        self._tail_len = 0
+
+    # --- Feed Newly Recorded Samples (Writer Thread Only) ---
+    def append(self, block, scale=1.0):
+        block = np.asarray(block, dtype=np.float32)
+        if scale != 1.0:
+            block = block * scale
+        if block.ndim == 2:
+            # Multichannel: one envelope covering every channel
+            lo, hi = block.min(axis=1), block.max(axis=1)
+        else:
+            lo = hi = block
+        self.frames += len(block)
+
+        # Complete the partial bin left over from the previous block
+        if self._tail_len:
+            take = min(len(lo), self.BASE_BIN - self._tail_len)
+            self._tail_lo[self._tail_len : self._tail_len + take] = lo[:take]
+            self._tail_hi[self._tail_len : self._tail_len + take] = hi[:take]
+            self._tail_len += take
+            lo, hi = lo[take:], hi[take:]
+            if self._tail_len < self.BASE_BIN:
+                return
+            self._push(
+                0, self._tail_lo.min(keepdims=True), self._tail_hi.max(keepdims=True)
+            )
+            self._tail_len = 0
+
+        full = (len(lo) // self.BASE_BIN) * self.BASE_BIN
+        if full:
+            self._push(
+                0,
+                lo[:full].reshape(-1, self.BASE_BIN).min(axis=1),
+                hi[:full].reshape(-1, self.BASE_BIN).max(axis=1),
+            )
+
+        rest = len(lo) - full
+        if rest:
+            self._tail_lo[:rest] = lo[full:]
+            self._tail_hi[:rest] = hi[full:]
+            self._tail_len = rest
+
+    # --- Append Bins to a Level and Fold Completed Pairs Upwards ---
+    def _push(self, level, mins, maxs):
+        current = self.levels[level]
+        current.append(mins, maxs)
+
+        pairs = len(current) // 2
+        if pairs == 0:
+            return
+        if level + 1 == len(self.levels):
+            self.levels.append(PeakLevel(current.bin_size * 2))
+        parent = self.levels[level + 1]
+
+        done = len(parent)
+        if pairs > done:
+            lo = current.mins.view()[done * 2 : pairs * 2]
+            hi = current.maxs.view()[done * 2 : pairs * 2]
+            self._push(
+                level + 1,
+                np.minimum(lo[0::2], lo[1::2]),
+                np.maximum(hi[0::2], hi[1::2]),
+            )
+
+    # --- Build the Whole Pyramid From Existing Samples ---
+    def build(self, data, scale=1.0, blocksize=1 << 20):
+        self.reset()
+        for start in range(0, len(data), blocksize):
+            self.append(data[start : start + blocksize], scale)
+
+    # --- Min/Max per Column, O(width) at Any Zoom Level ---
+    def peaks(self, start, samples_per_col, width):
+        mins = np.zeros(width, dtype=np.float32)
+        maxs = np.zeros(width, dtype=np.float32)
+        samples_per_col = max(1, int(samples_per_col))
+
+        # Coarsest level whose bins still fit inside one column
+        level = self.levels[0]
+        for candidate in self.levels:
+            if candidate.bin_size > samples_per_col or len(candidate) == 0:
+                break
+            level = candidate
+
+        count = len(level)
+        if count == 0:
+            return mins, maxs
+
+        edges = (start + np.arange(width + 1) * samples_per_col) // level.bin_size
+        edges = np.clip(edges, 0, count)
+        cols = np.nonzero(edges[1:] > edges[:-1])[0]
+        if len(cols) == 0:
+            return mins, maxs
+
+        idx = edges[cols]
+        end = edges[cols[-1] + 1]
+        mins[cols] = np.minimum.reduceat(level.mins.view()[:end], idx)
+        maxs[cols] = np.maximum.reduceat(level.maxs.view()[:end], idx)
+        return mins, maxs
+
+    # --- Persist Base Level Next to the Audio File ---
+    def save(self):
+        if self.path is None:
+            return
+        base = self.levels[0]
+        with open(self.path, "wb") as f:
+            np.savez(
+                f,
+                frames=np.array([self.frames]),
+                mins=base.mins.view(),
+                maxs=base.maxs.view(),
+                tail_lo=self._tail_lo[: self._tail_len],
+                tail_hi=self._tail_hi[: self._tail_len],
+            )
+
+    # --- Load a Saved Index (Upper Levels Are Rebuilt From the Base) ---
+    def load(self):
+        if self.path is None or not os.path.exists(self.path):
+            return False
+        try:
+            with np.load(self.path) as saved:
+                frames = int(saved["frames"][0])
+                mins, maxs = saved["mins"], saved["maxs"]
+                tail_lo, tail_hi = saved["tail_lo"], saved["tail_hi"]
+        except Exception:
+            return False
+
+        self.reset()
+        if len(mins):
+            self._push(0, mins, maxs)
+        self._tail_lo[: len(tail_lo)] = tail_lo
+        self._tail_hi[: len(tail_hi)] = tail_hi
+        self._tail_len = len(tail_lo)
+        self.frames = frames
+        return True
+
+    def remove(self):
+        try:
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,583 @@
+import os
+import threading
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from audio.effects import EffectChain
+from audio.engine import AudioTrack, Clip
+from audio.meters import TRACK_METERS, MeterBank
+from audio.mixer import Mixer
+
+
+# --- Ask the OS for Real-time Scheduling (2 = FIFO, 1 = Nice, 0 = None) ---
+def request_realtime(priority=70):
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        return 2
+    except (AttributeError, OSError):
+        pass
+    try:
+        os.nice(-10)
+        return 1
+    except (AttributeError, OSError):
+        return 0
+
+
+## --- EngineStatus: Transport and Load Counters in Shared Memory ---
+#
+# One float64 slot per field. The audio process overwrites the whole row
+# every loop; the UI reads single slots without locking, so a reader may
+# mix values from two consecutive publishes, which is fine for display.
+# The mixer's meter bank follows the fields, then one (take id, peak,
+# mean square, clipped) row per take being recorded.
+class EngineStatus:
+    FIELDS = (
+        "heartbeat",
+        "playing",
+        "sample",
+        "callbacks",
+        "frames",
+        "avg_load",
+        "last_load",
+        "peak_load",
+        "max_us",
+        "xruns",
+        "blocksize",
+        "realtime",
+    )
+    METERS = TRACK_METERS + 1
+    INPUTS = 16
+
+    def __init__(self, name=None):
+        create = name is None
+        fields = len(self.FIELDS)
+        meters = self.METERS * MeterBank.COLUMNS
+        size = (fields + meters + self.INPUTS * 4) * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        block = np.ndarray(size // 8, dtype=np.float64, buffer=self.shm.buf)
+        if create:
+            block[:] = 0
+        self.values = block[:fields]
+        self.meters = MeterBank(
+            self.METERS, block[fields : fields + meters].reshape(-1, self.METERS)
+        )
+        self.inputs = block[fields + meters :].reshape(self.INPUTS, 4)
+        self._slots = {field: i for i, field in enumerate(self.FIELDS)}
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def __getitem__(self, field):
+        return float(self.values[self._slots[field]])
+
+    # --- Copy the Mixer's Live State (Audio Process) ---
+    def publish(self, mixer, realtime, recording=()):
+        stats = mixer.stats
+        self.values[:] = (
+            time.time(),
+            mixer.is_playing,
+            mixer.current_sample,
+            stats.callbacks,
+            stats.frames,
+            stats.avg_load,
+            stats.last_load,
+            stats.peak_load,
+            stats.max_ns / 1000,
+            stats.xruns,
+            mixer.blocksize,
+            realtime,
+        )
+        self.meters.values[:] = mixer.meters.values
+        inputs = self.inputs
+        inputs[:] = 0
+        for row, (rid, track) in zip(inputs, recording):
+            row[0] = rid
+            row[1:] = track.meter.values[:, 0]
+
+    # --- Level Row of a Take Being Recorded, by Take Id ---
+    def input_meter(self, rid):
+        for row in self.inputs:
+            if row[0] == rid:
+                peak, square, clips = row[1:]
+                return float(peak), float(np.sqrt(max(square, 0.0))), int(clips)
+        return 0.0, 0.0, 0
+
+    def close(self, unlink=False):
+        self.values = self.meters = self.inputs = None
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+# --- Compact, Picklable Description of a Track for the Audio Process ---
+def track_spec(track, keys):
+    return {
+        "key": (track.audio_file, track.store.frames),
+        "path": track.audio_file,
+        "dtype": track.storage_dtype,
+        "fs": track.fs,
+        "channels": track.channels,
+        "volume": track.volume,
+        "pan": track.pan,
+        "muted": track.is_muted,
+        "soloed": track.is_soloed,
+        "effects": track.effects.to_list(),
+        "frozen": track.frozen is not None,
+        "clips": [
+            (keys[id(c.source)], c.start, c.offset, c.duration, c.gain)
+            for c in track.clips
+            if id(c.source) in keys
+        ],
+    }
+
+
+## --- AudioEngine: Owns the Real Mixer and Streams Inside the Audio Process ---
+class AudioEngine:
+    def __init__(self, conn, status_name, fs, channels, realtime):
+        self.conn = conn
+        self.status = EngineStatus(status_name)
+        self.mixer = Mixer(fs, channels)
+        self.tracks = {}
+        self.recording = {}
+        self.realtime = request_realtime() if realtime else 0
+
+    # --- Serve Commands, Publishing Status Between Them ---
+    def run(self):
+        try:
+            while True:
+                if self.conn.poll(0.01):
+                    try:
+                        op, seq, args = self.conn.recv()
+                    except EOFError:
+                        break
+                    if op == "quit":
+                        break
+                    self.handle(op, seq, args)
+                self.status.publish(
+                    self.mixer, self.realtime, list(self.recording.items())
+                )
+        finally:
+            self.mixer.stop()
+            self.status.close()
+
+    def handle(self, op, seq, args):
+        result, error = None, None
+        try:
+            result = getattr(self, "cmd_" + op)(*args)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        if seq is not None:
+            self.conn.send(("reply", seq, result, error))
+
+    # --- Map the UI's Takes (Same Raw Files, Shared Through the Page Cache) ---
+    def _track(self, spec):
+        track = self.tracks.get(spec["key"])
+        if track is None:
+            track = AudioTrack(storage_dtype=spec["dtype"], path=spec["path"])
+            track.channels = track.store.channels = spec["channels"]
+            track.fs = spec["fs"]
+            track.session_fs = self.mixer.fs
+            track.load()
+        track.volume = spec["volume"]
+        track.pan = spec["pan"]
+        track.is_muted = spec["muted"]
+        track.is_soloed = spec["soloed"]
+        if spec["effects"] != track.effects.to_list():
+            # Edited in the UI: rebuild the inserts (fresh state, same order)
+            chain = EffectChain.from_list(spec["effects"], track.rate)
+            track.effects.set_effects(chain.effects)
+        return track
+
+    def cmd_session(self, state):
+        mixer = self.mixer
+        mixer.metronome.set_time_signature(
+            state["beats_per_bar"], state["subdivision"]
+        )
+        mixer.bpm = state["bpm"]
+        mixer.metronome_enabled = state["metronome"]
+        mixer.output_device = state["output_device"]
+        mixer.latency_samples = state["latency_samples"]
+
+        tracks = {spec["key"]: self._track(spec) for spec in state["tracks"]}
+        by_path = {key[0]: track for key, track in tracks.items()}
+        for spec in state["tracks"]:
+            clips = []
+            for path, start, offset, duration, gain in spec["clips"]:
+                source = by_path.get(path)
+                if source is not None and source.data is not None:
+                    clips.append(
+                        Clip(source.data, start, offset, duration, gain, source.scale)
+                    )
+            track = tracks[spec["key"]]
+            track.set_clips(clips)
+            if spec["frozen"]:
+                # The UI already rendered it; this only maps the file
+                track.freeze(reuse=True)
+        self.tracks = tracks
+
+        ordered = list(tracks.values())
+        if mixer.overdub_track is not None:
+            ordered.append(mixer.overdub_track)
+        mixer.set_tracks(ordered)
+
+    def cmd_stream(self):
+        self.mixer.ensure_stream()
+
+    def cmd_close_stream(self):
+        self.mixer.close_stream()
+
+    def cmd_play(self):
+        self.mixer.start_transport()
+
+    def cmd_stop(self):
+        self.mixer.stop_transport()
+
+    def cmd_seek(self, sample):
+        self.mixer.seek(sample)
+
+    def cmd_streaming(self, enabled):
+        if enabled:
+            self.mixer.enable_streaming()
+        else:
+            self.mixer.disable_streaming()
+
+    def cmd_settings(self, blocksize, latency):
+        self.mixer.latency = latency
+        self.mixer.set_blocksize(blocksize)
+
+    def cmd_reset_stats(self):
+        self.mixer.stats.reset()
+
+    def _new_take(self, device, channels, fs):
+        track = AudioTrack()
+        track.input_device = device
+        track.channels = channels
+        track.fs = fs
+        return track
+
+    @staticmethod
+    def _take(track):
+        return {
+            "path": track.audio_file,
+            "fs": track.fs,
+            "channels": track.channels,
+            "take_start": track.take_start,
+            "clips": [(c.start, c.offset, c.duration) for c in track.clips],
+        }
+
+    def cmd_record(self, rid, device, channels, fs):
+        track = self._new_take(device, channels, fs)
+        self.mixer.record_track(track)
+        self.recording[rid] = track
+
+    def cmd_stop_record(self, rid):
+        return self._take(self.mixer.stop_track(self.recording.pop(rid)))
+
+    def cmd_overdub(self, rid, device, channels):
+        track = self._new_take(device, channels, self.mixer.fs)
+        self.recording[rid] = track
+        self.mixer.start_overdub(track)
+
+    def cmd_stop_overdub(self, rid):
+        self.recording.pop(rid, None)
+        track = self.mixer.stop_overdub()
+        return None if track is None else self._take(track)
+
+    def cmd_measure(self, device, timeout):
+        lag = self.mixer.measure_latency(device, timeout)
+        return lag, self.mixer.latency_measured
+
+
+# --- Entry Point of the Audio Process ---
+def run_engine(conn, status_name, fs, channels, realtime):
+    AudioEngine(conn, status_name, fs, channels, realtime).run()
+
+
+## --- EngineProcess: Starts the Audio Process and Carries Commands to It ---
+#
+# Commands are (op, seq, args) tuples over a Pipe. Fire-and-forget
+# commands use seq None; call() waits for the matching reply, which a
+# reader thread routes back so a slow call (latency probe) never blocks
+# other senders.
+class EngineProcess:
+    def __init__(self, fs=44100, channels=2, realtime=True, context="spawn"):
+        self.status = EngineStatus()
+        ctx = mp.get_context(context)
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(
+            target=run_engine,
+            args=(child, self.status.name, fs, channels, realtime),
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+
+        self._send_lock = threading.Lock()
+        self._seq = 0
+        self._pending = {}
+        self._reader = threading.Thread(target=self._read, daemon=True)
+        self._reader.start()
+
+    def _read(self):
+        while True:
+            try:
+                _, seq, result, error = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            waiter = self._pending.pop(seq, None)
+            if waiter is not None:
+                waiter[1:] = [result, error]
+                waiter[0].set()
+        # Wake every caller if the audio process went away
+        for waiter in list(self._pending.values()):
+            waiter[1:] = [None, "audio process exited"]
+            waiter[0].set()
+
+    def send(self, op, *args):
+        with self._send_lock:
+            self.conn.send((op, None, args))
+
+    def call(self, op, *args, timeout=10.0):
+        waiter = [threading.Event(), None, None]
+        with self._send_lock:
+            self._seq += 1
+            seq = self._seq
+            self._pending[seq] = waiter
+            self.conn.send((op, seq, args))
+        if not waiter[0].wait(timeout):
+            self._pending.pop(seq, None)
+            raise TimeoutError(f"audio process did not answer {op!r}")
+        if waiter[2] is not None:
+            raise RuntimeError(waiter[2])
+        return waiter[1]
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self, timeout=2.0):
+        try:
+            self.send("quit")
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.status.close(unlink=True)
+
+
+## --- RemoteMixer: Mixer Front End Whose Audio Runs in Another Process ---
+#
+# The UI keeps a local Mixer for editing state (tracks, graph length,
+# offline render, project save) but never opens a stream. Everything that
+# touches the sound card is forwarded to the audio process, and transport
+# position and load are read back from shared memory.
+class RemoteMixer(Mixer):
+    def __init__(self, fs=44100, channels=2, realtime=True, context="spawn"):
+        self.engine = None
+        super().__init__(fs, channels)
+        self._streaming = False
+        self.engine = EngineProcess(fs, channels, realtime, context)
+        self.push_session()
+
+    # --- Live State Mirrored From the Audio Process ---
+    @property
+    def current_sample(self):
+        if self.engine is None:
+            return self._current_sample
+        return int(self.engine.status["sample"])
+
+    @current_sample.setter
+    def current_sample(self, value):
+        self._current_sample = value
+
+    @property
+    def is_playing(self):
+        if self.engine is None:
+            return self._is_playing
+        return bool(self.engine.status["playing"])
+
+    @is_playing.setter
+    def is_playing(self, value):
+        self._is_playing = value
+
+    @property
+    def stats(self):
+        stats = self._stats
+        if self.engine is not None:
+            status = self.engine.status
+            stats.callbacks = int(status["callbacks"])
+            stats.frames = int(status["frames"])
+            stats.avg_load = status["avg_load"]
+            stats.last_load = status["last_load"]
+            stats.peak_load = status["peak_load"]
+            stats.max_ns = status["max_us"] * 1000
+            stats.output_underflows = int(status["xruns"])
+        return stats
+
+    @stats.setter
+    def stats(self, value):
+        self._stats = value
+
+    @property
+    def realtime(self):
+        return int(self.engine.status["realtime"])
+
+    @property
+    def bpm(self):
+        return self.metronome.bpm
+
+    @bpm.setter
+    def bpm(self, value):
+        self.metronome.set_tempo(value)
+        self.push_session()
+
+    # --- Ship Tracks, Tempo and Device Choice to the Audio Process ---
+    def session_state(self):
+        tracks = [t for t in self.tracks if t.data is not None and not t.is_recording]
+        keys = {id(t.data): t.audio_file for t in tracks}
+        # The engine's mixer meters the tracks in this order
+        self._meter_slots = {id(t): i + 1 for i, t in enumerate(tracks)}
+        return {
+            "bpm": self.metronome.bpm,
+            "beats_per_bar": self.metronome.beats_per_bar,
+            "subdivision": self.metronome.subdivision,
+            "metronome": self.metronome_enabled,
+            "output_device": self.output_device,
+            "latency_samples": self.latency_samples,
+            "tracks": [track_spec(t, keys) for t in tracks],
+        }
+
+    # --- Meters Come From the Engine's Shared Status Block ---
+    def track_meter(self, track):
+        status = self.engine.status
+        if track.is_recording:
+            return status.input_meter(id(track))
+        return status.meters.read(self._meter_slots.get(id(track)))
+
+    def master_meter(self):
+        return self.engine.status.meters.read(0)
+
+    def push_session(self):
+        if self.engine is not None:
+            self.engine.send("session", self.session_state())
+
+    def update(self):
+        super().update()
+        self.push_session()
+
+    def ensure_stream(self):
+        self.push_session()
+        self.engine.send("stream")
+
+    def close_stream(self):
+        if self.engine is not None:
+            self.engine.send("close_stream")
+
+    def start_transport(self):
+        self.push_session()
+        self.engine.send("play")
+
+    def stop_transport(self):
+        self.engine.send("stop")
+
+    def seek(self, sample):
+        self.engine.send("seek", max(0, int(sample)))
+
+    @property
+    def streaming(self):
+        return self._streaming
+
+    def enable_streaming(self, depth_seconds=4.0):
+        self._streaming = True
+        self.engine.send("streaming", True)
+
+    def disable_streaming(self):
+        self._streaming = False
+        if self.engine is not None:
+            self.engine.send("streaming", False)
+
+    def set_blocksize(self, blocksize):
+        self.blocksize = blocksize
+        if self.engine is not None:
+            self.engine.send("settings", blocksize, self.latency)
+
+    def tune(self):
+        if self.tuner is None or self.overdub_track is not None:
+            return None
+        stats = self.stats
+        if not stats.callbacks:
+            return None
+        blocksize = self.tuner.observe(stats, time.monotonic())
+        if blocksize is not None:
+            self.set_blocksize(blocksize)
+            self.engine.send("reset_stats")
+        return blocksize
+
+    # --- Point a UI Track at the Take the Audio Process Wrote ---
+    @staticmethod
+    def _adopt(track, take):
+        track.channels = take["channels"]
+        track.set_path(take["path"])
+        # Still a scratch take until the project saves it
+        track.temporary = True
+        track.fs = take["fs"]
+        track.take_start = take["take_start"]
+        track.dirty = True
+        track.load()
+
+    def record_track(self, track):
+        self.engine.call(
+            "record", id(track), track.input_device, track.channels, track.fs
+        )
+        track.is_recording = True
+
+    def stop_track(self, track):
+        take = self.engine.call("stop_record", id(track))
+        track.is_recording = False
+        self._adopt(track, take)
+        return track
+
+    def start_overdub(self, track):
+        track.fs = self.fs
+        self.overdub_track = track
+        self.push_session()
+        self.engine.call("overdub", id(track), track.input_device, track.channels)
+        track.is_recording = True
+
+    def stop_overdub(self):
+        track = self.overdub_track
+        if track is None:
+            return None
+        take = self.engine.call("stop_overdub", id(track))
+        self.overdub_track = None
+        track.is_recording = False
+        if take is not None:
+            self._adopt(track, take)
+            if track.data is not None:
+                track.set_clips(
+                    Clip(track.data, start, offset, duration, scale=track.scale)
+                    for start, offset, duration in take["clips"]
+                )
+        self.add_track(track)
+        return track
+
+    def measure_latency(self, input_device=None, timeout=3.0):
+        lag, measured = self.engine.call(
+            "measure", input_device, timeout, timeout=timeout + 5
+        )
+        self.latency_samples = lag
+        self.latency_measured = measured
+        self.push_session()
+        return lag
+
+    def stop(self):
+        if self.engine is not None:
+            self.engine.stop()
+            self.engine = None
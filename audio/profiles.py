@@ -0,0 +1,76 @@
+## --- Latency Profiles: Block Size / Device Latency Pairs for Every Stream ---
+#
+# blocksize is frames per callback; latency is passed straight to
+# sounddevice ("low" / "high" or seconds) for both directions.
+PROFILES = {
+    "ultra-low": {"blocksize": 64, "latency": "low"},
+    "balanced": {"blocksize": 256, "latency": "low"},
+    "safe": {"blocksize": 1024, "latency": "high"},
+}
+
+# Cycle order for the UI; "auto" starts from balanced and tunes
+PROFILE_NAMES = ("ultra-low", "balanced", "safe", "auto")
+
+
+## --- BlockTuner: Settle on the Smallest Glitch-free Block Size ---
+#
+# Fed the output stream's StreamStats once in a while. Any new xrun, or a
+# callback that overran its block, bumps the block size up and marks the
+# old size as unusable. After a calm stretch with plenty of headroom it
+# tries the next smaller size, but never one that already glitched, so
+# it converges instead of oscillating.
+class BlockTuner:
+    SIZES = (32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+    def __init__(self, blocksize=256, settle_seconds=5.0, headroom=0.25):
+        self.blocksize = blocksize
+        self.settle_seconds = settle_seconds
+        # Step down only while the average load stays below this
+        self.headroom = headroom
+        # Smallest size not yet known to glitch
+        self.floor = self.SIZES[0]
+        self.reset()
+
+    def reset(self):
+        self._xruns = None
+        self._calm_since = None
+
+    def _step(self, direction):
+        sizes = self.SIZES
+        i = max(0, min(len(sizes) - 1, sizes.index(self._nearest()) + direction))
+        return sizes[i]
+
+    def _nearest(self):
+        return min(self.SIZES, key=lambda s: abs(s - self.blocksize))
+
+    # --- Returns a New Block Size When the Stream Should Be Reopened ---
+    def observe(self, stats, now):
+        xruns = stats.xruns
+        glitched = (self._xruns is not None and xruns > self._xruns) or (
+            stats.peak_load >= 1.0
+        )
+        self._xruns = xruns
+
+        if glitched:
+            larger = self._step(1)
+            self.floor = max(self.floor, larger)
+            return self._move(larger)
+
+        if self._calm_since is None:
+            self._calm_since = now
+            return None
+        if now - self._calm_since < self.settle_seconds:
+            return None
+        if stats.avg_load >= self.headroom:
+            return None
+        smaller = self._step(-1)
+        if smaller < self.floor or smaller == self.blocksize:
+            return None
+        return self._move(smaller)
+
+    def _move(self, blocksize):
+        if blocksize == self.blocksize:
+            return None
+        self.blocksize = blocksize
+        self.reset()
+        return blocksize
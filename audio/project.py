@@ -0,0 +1,220 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+from audio.effects import EffectChain
+from audio.engine import AudioTrack, Clip
+from audio.resample import cached_path
+
+PROJECT_VERSION = 1
+
+
+## --- Project: .tuidio Session File Plus Binary Audio Sidecars ---
+#
+# song.tuidio holds mixer, track and clip state as small JSON.
+# song.tuidio.d/ holds one raw sample file (.f32 / .i16) and one peak
+# index (.peaks) per take. Opening only maps the raw files, so audio is
+# paged in when playback or rendering touches it.
+class Project:
+    def __init__(self, path):
+        if not path.endswith(".tuidio"):
+            path += ".tuidio"
+        self.path = os.path.abspath(path)
+        self.sidecar_dir = self.path + ".d"
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def sidecar(self, uid):
+        return os.path.join(self.sidecar_dir, f"{uid}.wav")
+
+    # --- Copy a Take Into the Sidecar Directory Only If It Changed ---
+    def _save_audio(self, track):
+        target = self.sidecar(track.uid)
+        saved = AudioTrack(storage_dtype=track.storage_dtype, path=target)
+        saved.store.channels = track.channels
+        self._save_frozen(track, saved)
+        if not track.dirty and os.path.exists(saved.store.path):
+            return False
+        if track.store.path != saved.store.path:
+            copies = [(track.store.path, saved.store.path)]
+            if track.playback_store is not track.store:
+                # Carry the rate-converted copy so reopening skips the resample
+                converted = cached_path(saved.store, track.rate)
+                copies.append((track.playback_store.path, converted))
+            peaks = os.path.splitext(copies[-1][1])[0] + ".peaks"
+            copies.append((track.peaks.path, peaks))
+            for src, dst in copies:
+                if os.path.exists(src):
+                    shutil.copyfile(src, dst)
+        if not os.path.exists(saved.store.path):
+            # Same path but gone: an undo went back past the save that pruned it
+            self._restore_audio(track, saved)
+        track.dirty = False
+        return True
+
+    # --- Rewrite a Pruned Take From the Samples the Track Still Holds ---
+    #
+    # A deleted file stays readable through its mapping. When only the
+    # rate-converted copy is left, it becomes the take at the session rate.
+    def _restore_audio(self, track, saved):
+        with open(saved.store.path, "wb") as f:
+            np.asarray(track.data).tofile(f)
+        if track.playback_store is not track.store:
+            track.fs = track.rate
+        peaks = track.peaks
+        track.set_path(saved.audio_file)
+        peaks.path = track.peaks.path
+        track.peaks = peaks
+        peaks.save()
+
+    # --- Keep a Frozen Render Next to Its Take So Reopening Skips It ---
+    def _save_frozen(self, track, saved):
+        if track.frozen is None:
+            return
+        src = cached_path(track.store, "frozen")
+        dst = cached_path(saved.store, "frozen")
+        if src == dst or not os.path.exists(src):
+            return
+        if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            return
+        shutil.copyfile(src, dst)
+
+    def _track_state(self, track, uids):
+        state = {
+            "uid": track.uid,
+            "volume": track.volume,
+            "pan": track.pan,
+            "channels": track.channels,
+            "muted": track.is_muted,
+            "soloed": track.is_soloed,
+            "fs": track.fs,
+            "dtype": track.storage_dtype,
+            "frames": 0 if track.data is None else len(track.data),
+        }
+        if len(track.effects):
+            state["effects"] = track.effects.to_list()
+            state["frozen"] = track.frozen is not None
+        if track.clips:
+            state["clips"] = [
+                {
+                    "source": uids[id(c.source)],
+                    "start": c.start,
+                    "offset": c.offset,
+                    "duration": c.duration,
+                    "gain": c.gain,
+                }
+                for c in track.clips
+                if id(c.source) in uids
+            ]
+        return state
+
+    # --- Write the Session; Audio Sidecars Only for Changed Tracks ---
+    #
+    # keep names further take uids whose sidecars must survive pruning,
+    # e.g. takes undo history can still bring back.
+    def save(self, mixer, extra=None, keep=()):
+        began = time.perf_counter()
+        os.makedirs(self.sidecar_dir, exist_ok=True)
+
+        written = 0
+        uids = {}
+        for track in mixer.tracks:
+            if track.data is not None and not track.is_recording:
+                uids[id(track.data)] = track.uid
+                written += self._save_audio(track)
+
+        session = {
+            "version": PROJECT_VERSION,
+            "fs": mixer.fs,
+            "bpm": mixer.bpm,
+            "beats_per_bar": mixer.metronome.beats_per_bar,
+            "subdivision": mixer.metronome.subdivision,
+            "tracks": [self._track_state(t, uids) for t in mixer.tracks],
+        }
+        if extra:
+            session.update(extra)
+
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(session, f, indent=2)
+        os.replace(tmp, self.path)
+        self._prune({t["uid"] for t in session["tracks"]} | set(keep))
+
+        return {
+            "path": self.path,
+            "tracks": len(session["tracks"]),
+            "written": written,
+            "elapsed": time.perf_counter() - began,
+        }
+
+    # --- Remove Sidecars for Takes No Longer in the Session ---
+    def _prune(self, uids):
+        for name in os.listdir(self.sidecar_dir):
+            # Rate-converted caches are named <uid>@<fs>.<ext>
+            if os.path.splitext(name)[0].split("@")[0] not in uids:
+                try:
+                    os.remove(os.path.join(self.sidecar_dir, name))
+                except OSError:
+                    pass
+
+    # --- The Raw Session Dict, Without Touching Any Audio ---
+    def read(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    # --- Read the Session and Map Every Take Lazily ---
+    def load(self, mixer):
+        began = time.perf_counter()
+        session = self.read()
+
+        mixer.metronome.set_time_signature(
+            session.get("beats_per_bar", 4), session.get("subdivision", 1)
+        )
+        mixer.bpm = session.get("bpm", mixer.bpm)
+
+        tracks = []
+        by_uid = {}
+        for state in session.get("tracks", []):
+            track = AudioTrack(
+                storage_dtype=state.get("dtype", "float32"),
+                path=self.sidecar(state["uid"]),
+            )
+            track.channels = track.store.channels = state.get("channels", 1)
+            track.pan = state.get("pan", 0.0)
+            track.fs = state.get("fs", mixer.fs)
+            track.session_fs = mixer.fs
+            track.volume = state.get("volume", 1.0)
+            track.is_muted = state.get("muted", False)
+            track.is_soloed = state.get("soloed", False)
+            track.effects = EffectChain.from_list(state.get("effects"), mixer.fs)
+            if state.get("frames"):
+                track.load()
+            tracks.append(track)
+            by_uid[track.uid] = track
+
+        for state, track in zip(session.get("tracks", []), tracks):
+            clips = []
+            for c in state.get("clips", []):
+                source = by_uid.get(c["source"])
+                if source is None or source.data is None:
+                    continue
+                clips.append(
+                    Clip(
+                        source.data,
+                        c["start"],
+                        c["offset"],
+                        c["duration"],
+                        c.get("gain", 1.0),
+                        source.scale,
+                    )
+                )
+            track.set_clips(clips)
+            if state.get("frozen"):
+                track.freeze(reuse=True)
+
+        mixer.set_tracks(tracks)
+        session["elapsed"] = time.perf_counter() - began
+        return session
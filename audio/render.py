@@ -0,0 +1,52 @@
+import time
+import numpy as np
+import soundfile as sf
+
+
+## --- Renderer: Offline, Faster-than-realtime Mixdown to a Sound File ---
+class Renderer:
+    def __init__(self, mixer, blocksize=65536, subtype="PCM_16"):
+        self.mixer = mixer
+        self.blocksize = blocksize
+        self.subtype = subtype
+        self.progress = 0.0
+        self.speed = 0.0
+        self.cancelled = False
+
+    # --- Stream the Mix Block by Block Straight Into the Writer ---
+    def render(self, path, start_sample=0, end_sample=None):
+        fs = self.mixer.fs
+        # Private graph: its scratch buffers are not shared with the live stream
+        graph = self.mixer.compile(streaming=False)
+        end = graph.length if end_sample is None else end_sample
+        total = max(0, end - start_sample)
+        channels = self.mixer.channels
+        block = np.zeros((self.blocksize, channels), dtype=np.float32)
+
+        self.progress = 0.0
+        self.cancelled = False
+        began = time.perf_counter()
+
+        with sf.SoundFile(
+            path, mode="w", samplerate=fs, channels=channels, subtype=self.subtype
+        ) as f:
+            pos = start_sample
+            while pos < end and not self.cancelled:
+                frames = min(self.blocksize, end - pos)
+                out = block[:frames]
+                out.fill(0)
+                self.mixer.mix_tracks(out, pos, frames, graph)
+                f.write(out)
+                pos += frames
+                self.progress = (pos - start_sample) / total
+
+        elapsed = time.perf_counter() - began
+        seconds = total / fs
+        self.speed = seconds / elapsed if elapsed > 0 else float("inf")
+        return {
+            "path": path,
+            "frames": total,
+            "seconds": seconds,
+            "elapsed": elapsed,
+            "realtime": self.speed,
+        }
@@ -0,0 +1,127 @@
+import os
+from math import gcd
+import numpy as np
+from audio.storage import MappedStore
+
+
+# --- Kaiser-windowed Sinc Prototype Split Into a Polyphase Filter Bank ---
+def design_bank(up, down, taps=32, beta=8.6, rolloff=0.95):
+    length = taps * up
+    # Cutoff at the lower Nyquist, normalized to the upsampled rate
+    cutoff = 0.5 * rolloff / max(up, down)
+    # Centre on a whole upsampled sample so the delay is exactly compensated
+    delay = length // 2
+    n = np.arange(length) - delay
+    proto = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta) * up
+    # bank[p, k] = proto[p + k * up], reversed so it dots a forward window
+    bank = proto.reshape(taps, up).T[:, ::-1]
+    return np.ascontiguousarray(bank, dtype=np.float32), delay
+
+
+## --- Resampler: Streaming Rational-ratio Polyphase Converter ---
+#
+# Output sample n sits at upsampled position n * down + delay, i.e. input
+# frame i = pos // up filtered with phase pos % up. Each block gathers all
+# of its input windows at once and applies the matching phases with one
+# einsum, so the cost is O(taps) per output sample with no Python loop.
+class Resampler:
+    def __init__(self, fs_in, fs_out, channels=1, taps=32):
+        g = gcd(int(fs_in), int(fs_out))
+        self.up = int(fs_out) // g
+        self.down = int(fs_in) // g
+        self.taps = taps
+        self.channels = channels
+        self.bank, self.delay = design_bank(self.up, self.down, taps)
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros((self.taps - 1, self.channels), dtype=np.float32)
+        self.received = 0
+        self.produced = 0
+
+    # --- Output Frames Expected for a Given Number of Input Frames ---
+    def output_frames(self, frames):
+        return -(-frames * self.up // self.down)
+
+    # --- Convert One Block; Returns Every Output Frame It Completes ---
+    def process(self, block):
+        block = np.asarray(block, dtype=np.float32)
+        mono = block.ndim == 1
+        block = block.reshape(len(block), self.channels)
+
+        buf = np.concatenate([self._history, block])
+        first = self.received
+        self.received += len(block)
+        self._history = buf[len(buf) - (self.taps - 1) :]
+
+        last = (self.received * self.up - 1 - self.delay) // self.down
+        if last < self.produced:
+            out = np.zeros((0, self.channels), dtype=np.float32)
+            return out[:, 0] if mono else out
+
+        pos = np.arange(self.produced, last + 1) * self.down + self.delay
+        self.produced = last + 1
+        windows = np.lib.stride_tricks.sliding_window_view(buf, self.taps, axis=0)
+        out = np.einsum(
+            "nct,nt->nc", windows[pos // self.up - first], self.bank[pos % self.up]
+        )
+        return out[:, 0] if mono else out
+
+    # --- Drain the Filter Tail Once the Input Has Ended ---
+    def flush(self):
+        target = self.output_frames(self.received)
+        pad = np.zeros((self.taps + self.delay // self.up + 1, self.channels))
+        out = self.process(pad)
+        # Padding counts as input; only emit what the real input implies
+        keep = max(0, len(out) - (self.produced - target))
+        self.produced = target
+        return out[:keep] if self.channels > 1 else out[:keep, 0]
+
+
+# --- Path of the Converted Copy of a Take at Another Rate ---
+def cached_path(store, fs):
+    root, ext = os.path.splitext(store.path)
+    return f"{root}@{fs}{ext}"
+
+
+# --- Convert a Take to the Session Rate Once; Reuse It While Fresh ---
+def conform_store(store, fs_in, fs_out, blocksize=1 << 16):
+    cache = MappedStore(cached_path(store, fs_out), store.dtype_name, store.channels)
+    source = store.map()
+    if source is None:
+        return cache
+    if cache.frames and os.path.getmtime(cache.path) >= os.path.getmtime(store.path):
+        return cache
+
+    resampler = Resampler(fs_in, fs_out, store.channels)
+    target = MappedStore(cache.path, store.dtype_name, store.channels)
+    # Per-process name: parallel renders may convert the same take at once
+    target.path = partial = f"{cache.path}.{os.getpid()}.part"
+    target.open_writer()
+    try:
+        for start in range(0, len(source), blocksize):
+            block = np.asarray(source[start : start + blocksize], dtype=np.float32)
+            target.write(resampler.process(block * store.scale))
+        target.write(resampler.flush())
+    finally:
+        target.close_writer()
+    # Readers never see a half-written cache
+    os.replace(partial, cache.path)
+    return cache
+
+
+# --- Delete Every Cached Rate Conversion of a Take ---
+def remove_cached(store):
+    root, ext = os.path.splitext(store.path)
+    folder = os.path.dirname(root) or "."
+    prefix = os.path.basename(root) + "@"
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return
+    for name in names:
+        if name.startswith(prefix):
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
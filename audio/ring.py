@@ -0,0 +1,77 @@
+import numpy as np
+
+
+## --- FrameRing: Preallocated Single-producer / Single-consumer Ring ---
+#
+# The audio callback is the only writer and advances head; the writer
+# thread is the only reader and advances tail. Both are plain ints that
+# only ever grow, so neither side needs a lock. When the reader falls
+# behind, whatever does not fit is dropped and counted instead of
+# growing memory.
+class FrameRing:
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        self.capacity = max(1, int(capacity))
+        self.channels = channels
+        self.buffer = np.zeros((self.capacity, channels), dtype=dtype)
+        self.head = 0
+        self.tail = 0
+        self.high_water = 0
+        self.dropped = 0
+        self.overruns = 0
+
+    @property
+    def pending(self):
+        return self.head - self.tail
+
+    @property
+    def fill(self):
+        return self.pending / self.capacity
+
+    # --- Copy a Callback Block In (Audio Thread, No Allocation) ---
+    def write(self, block):
+        frames = len(block)
+        head = self.head
+        used = head - self.tail
+        n = min(frames, self.capacity - used)
+        if n < frames:
+            self.dropped += frames - n
+            self.overruns += 1
+        if n <= 0:
+            return 0
+
+        a = head % self.capacity
+        first = min(n, self.capacity - a)
+        self.buffer[a : a + first] = block[:first]
+        if n > first:
+            self.buffer[: n - first] = block[first:n]
+
+        used += n
+        if used > self.high_water:
+            self.high_water = used
+        # Publish only after the frames are in place
+        self.head = head + n
+        return n
+
+    # --- Contiguous Views of Up to max_frames Pending Frames (Reader) ---
+    def peek(self, max_frames=None):
+        tail = self.tail
+        n = self.head - tail
+        if max_frames is not None:
+            n = min(n, max_frames)
+        if n <= 0:
+            return ()
+        a = tail % self.capacity
+        first = min(n, self.capacity - a)
+        if n > first:
+            return (self.buffer[a : a + first], self.buffer[: n - first])
+        return (self.buffer[a : a + first],)
+
+    def consume(self, frames):
+        self.tail += frames
+
+    def reset(self):
+        self.head = 0
+        self.tail = 0
+        self.high_water = 0
+        self.dropped = 0
+        self.overruns = 0
@@ -0,0 +1,71 @@
+import os
+import numpy as np
+import soundfile as sf
+
+
+## --- MappedStore: Raw Track Samples on Disk, Read Through np.memmap ---
+class MappedStore:
+    DTYPES = {"float32": np.float32, "int16": np.int16}
+    EXTENSIONS = {"float32": ".f32", "int16": ".i16"}
+
+    def __init__(self, base_path, dtype="float32", channels=1):
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Unsupported storage dtype: {dtype}")
+        self.dtype_name = dtype
+        self.dtype = np.dtype(self.DTYPES[dtype])
+        self.path = os.path.splitext(base_path)[0] + self.EXTENSIONS[dtype]
+        # Multiplier that brings stored samples back to the [-1, 1] range
+        self.scale = 1.0 / 32767 if dtype == "int16" else 1.0
+        # Frames are stored interleaved, channels fixed per take
+        self.channels = channels
+        self._file = None
+
+    # --- Convert a Float Block to the Storage Format ---
+    def encode(self, block):
+        if self.dtype == np.int16:
+            return (np.clip(block, -1.0, 1.0) * 32767).astype(np.int16)
+        return np.asarray(block, dtype=np.float32)
+
+    def open_writer(self):
+        self._file = open(self.path, "wb")
+
+    def write(self, block):
+        self.encode(block).tofile(self._file)
+
+    def close_writer(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    @property
+    def frames(self):
+        try:
+            return os.path.getsize(self.path) // (self.dtype.itemsize * self.channels)
+        except OSError:
+            return 0
+
+    # --- Map the Samples Read-only (None When Empty or Missing) ---
+    def map(self):
+        frames = self.frames
+        if frames == 0:
+            return None
+        shape = frames if self.channels == 1 else (frames, self.channels)
+        return np.memmap(self.path, dtype=self.dtype, mode="r", shape=shape)
+
+    # --- Rebuild the Raw File From Any Soundfile-readable Take ---
+    def import_file(self, audio_file, blocksize=65536):
+        self.channels = sf.info(audio_file).channels
+        self.open_writer()
+        try:
+            for block in sf.blocks(audio_file, blocksize=blocksize, dtype="float32"):
+                self.write(block)
+        finally:
+            self.close_writer()
+
+    def remove(self):
+        self.close_writer()
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,179 @@
+import threading
+import numpy as np
+
+
+## --- TrackStream: Read-ahead Ring Buffer for One Track File ---
+#
+# The prefetch thread is the only writer and the audio thread the only
+# reader. The valid sample range is published as one (lo, hi) tuple, so
+# the reader always sees a consistent window without taking a lock.
+class TrackStream:
+    channels = 1
+
+    def __init__(self, path, dtype, frames, capacity):
+        self.path = path
+        self.frames = frames
+        self.capacity = int(capacity)
+        self.ring = np.zeros(self.capacity, dtype=dtype)
+        self.itemsize = self.ring.itemsize
+        self.window = (0, 0)
+        self.read_pos = 0
+        self.seek_to = 0
+        self.underruns = 0
+        self._file = open(path, "rb")
+
+    def __len__(self):
+        return self.frames
+
+    @property
+    def lead(self):
+        return self.window[1] - self.read_pos
+
+    # --- Copy a Block Out of the Ring (Audio Thread) ---
+    #
+    # read_pos only advances once the samples are copied out: the prefetch
+    # thread treats everything before it as free space to refill.
+    def read_into(self, dest, start, frames):
+        end = min(start + frames, self.frames)
+        lo, hi = self.window
+
+        if start >= end:
+            dest[:] = 0
+        elif start < lo or start > hi:
+            # Playhead left the buffered window: ask for a prioritized refill
+            self.seek_to = start
+            self.underruns += 1
+            dest[:] = 0
+        else:
+            stop = min(end, hi)
+            n = stop - start
+            a = start % self.capacity
+            first = min(n, self.capacity - a)
+            dest[:first] = self.ring[a : a + first]
+            if n > first:
+                dest[first:n] = self.ring[: n - first]
+            dest[n:] = 0
+            if stop < end:
+                self.underruns += 1
+        self.read_pos = start + frames
+
+    # --- Restart the Window at a New Position (Prefetch Thread) ---
+    def reset(self, pos):
+        pos = max(0, min(int(pos), self.frames))
+        self.window = (pos, pos)
+        self.read_pos = pos
+
+    # --- Read the Next Region From Disk Into the Ring (Prefetch Thread) ---
+    def fill(self, max_frames):
+        lo, hi = self.window
+        room = self.read_pos + self.capacity - hi
+        n = min(max_frames, room, self.frames - hi)
+        if n <= 0:
+            return 0
+
+        # Evict what is about to be overwritten before writing it
+        lo = max(lo, hi + n - self.capacity)
+        self.window = (lo, hi)
+
+        self._file.seek(hi * self.itemsize)
+        done = 0
+        while done < n:
+            a = (hi + done) % self.capacity
+            take = min(n - done, self.capacity - a)
+            got = self._file.readinto(self.ring[a : a + take]) // self.itemsize
+            if got <= 0:
+                break
+            done += got
+        self.window = (lo, hi + done)
+        return done
+
+    def close(self):
+        try:
+            self._file.close()
+        except OSError:
+            pass
+
+
+## --- Prefetcher: Background Thread Keeping Every TrackStream Ahead ---
+class Prefetcher:
+    def __init__(self, fs=44100, depth_seconds=4.0, chunk=16384):
+        self.fs = fs
+        self.depth_seconds = depth_seconds
+        self.chunk = chunk
+        self.streams = {}
+        self.running = True
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def underruns(self):
+        return sum(s.underruns for s in list(self.streams.values()))
+
+    # --- Stream for a Track's Raw Sample File (None If Not on Disk) ---
+    def stream_for(self, track):
+        store = track.playback_store
+        frames = store.frames
+        if track.is_recording or frames == 0 or store.channels != 1:
+            # Multichannel takes play from their memory map instead
+            return None
+        stream = self.streams.get(store.path)
+        if stream is None or stream.frames != frames:
+            if stream is not None:
+                stream.close()
+            capacity = max(self.chunk * 2, int(self.fs * self.depth_seconds))
+            stream = TrackStream(store.path, store.dtype, frames, capacity)
+            self.streams[store.path] = stream
+            self._wake.set()
+        return stream
+
+    # --- Close Streams No Longer Referenced by the Mix ---
+    def retain(self, streams):
+        keep = {s.path for s in streams}
+        for path in list(self.streams):
+            if path not in keep:
+                self.streams.pop(path).close()
+
+    def seek(self, sample):
+        for stream in list(self.streams.values()):
+            stream.seek_to = sample
+        self._wake.set()
+
+    # --- Serve Seeks First, Then Whichever Stream Has the Least Lead ---
+    def _run(self):
+        while self.running:
+            streams = list(self.streams.values())
+            busy = False
+            try:
+                for stream in streams:
+                    pos = stream.seek_to
+                    if pos is not None:
+                        stream.seek_to = None
+                        stream.reset(pos)
+                        stream.fill(self.chunk)
+                        busy = True
+
+                hungry = [
+                    s
+                    for s in streams
+                    if s.lead < s.capacity - self.chunk and s.window[1] < s.frames
+                ]
+                if hungry:
+                    neediest = min(hungry, key=lambda s: s.lead)
+                    if neediest.fill(self.chunk) > 0:
+                        busy = True
+            except (ValueError, OSError):
+                # A stream was closed under us by retain(); pick up the new set
+                continue
+
+            if not busy:
+                self._wake.wait(0.005)
+                self._wake.clear()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        self._thread.join(timeout=1.0)
+        for stream in self.streams.values():
+            stream.close()
+        self.streams = {}
@@ -0,0 +1,116 @@
+import json
+import time
+
+
+## --- StreamStats: Fixed-size Callback Instrumentation for One Stream ---
+#
+# record() runs on the audio thread. It only bumps preallocated counters
+# and a log2 histogram (bucket i holds callbacks shorter than 2**i us),
+# so it never grows a container or takes a lock. Readers on other threads
+# may see a slightly torn mix of counters, which is fine for telemetry.
+class StreamStats:
+    BINS = 20
+
+    def __init__(self, name):
+        self.name = name
+        self.ring = None
+        self.reset()
+
+    def reset(self):
+        self.hist = [0] * self.BINS
+        self.callbacks = 0
+        self.frames = 0
+        self.busy_ns = 0
+        self.max_ns = 0
+        self.last_load = 0.0
+        self.peak_load = 0.0
+        self.avg_load = 0.0
+        self.input_overflows = 0
+        self.input_underflows = 0
+        self.output_overflows = 0
+        self.output_underflows = 0
+
+    # --- Account One Callback (Audio Thread) ---
+    def record(self, started_ns, frames, fs, status=None):
+        elapsed = time.perf_counter_ns() - started_ns
+        self.hist[min(self.BINS - 1, (elapsed // 1000).bit_length())] += 1
+        self.callbacks += 1
+        self.frames += frames
+        self.busy_ns += elapsed
+        if elapsed > self.max_ns:
+            self.max_ns = elapsed
+
+        load = elapsed * fs / (frames * 1e9) if frames else 0.0
+        self.last_load = load
+        self.avg_load += (load - self.avg_load) * 0.05
+        if load > self.peak_load:
+            self.peak_load = load
+
+        if status:
+            if status.input_overflow:
+                self.input_overflows += 1
+            if status.input_underflow:
+                self.input_underflows += 1
+            if status.output_overflow:
+                self.output_overflows += 1
+            if status.output_underflow:
+                self.output_underflows += 1
+
+    @property
+    def xruns(self):
+        return (
+            self.input_overflows
+            + self.input_underflows
+            + self.output_overflows
+            + self.output_underflows
+        )
+
+    # --- Upper Bound of a Percentile From the Histogram, in Microseconds ---
+    def percentile_us(self, q):
+        hist = list(self.hist)
+        total = sum(hist)
+        if total == 0:
+            return 0
+        target = total * q / 100
+        seen = 0
+        for i, count in enumerate(hist):
+            seen += count
+            if seen >= target:
+                return 1 << i
+        return 1 << (self.BINS - 1)
+
+    # --- Copy Counters for the UI or an Export (Non-audio Threads) ---
+    def snapshot(self):
+        snap = {
+            "name": self.name,
+            "callbacks": self.callbacks,
+            "frames": self.frames,
+            "avg_load": self.avg_load,
+            "last_load": self.last_load,
+            "peak_load": self.peak_load,
+            "max_us": self.max_ns / 1000,
+            "p50_us": self.percentile_us(50),
+            "p99_us": self.percentile_us(99),
+            "input_overflows": self.input_overflows,
+            "input_underflows": self.input_underflows,
+            "output_overflows": self.output_overflows,
+            "output_underflows": self.output_underflows,
+            "histogram_us": {f"<{1 << i}": c for i, c in enumerate(self.hist)},
+        }
+        if self.ring is not None:
+            snap["ring_capacity"] = self.ring.capacity
+            snap["ring_high_water"] = self.ring.high_water
+            snap["ring_overruns"] = self.ring.overruns
+            snap["dropped_frames"] = self.ring.dropped
+        return snap
+
+
+# --- Write Stream Snapshots to a JSON File for Post-mortems ---
+def export_stats(path, streams):
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "streams": [s.snapshot() for s in streams],
+    }
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return path
@@ -0,0 +1,196 @@
+import sys
+import numpy as np
+
+
+## --- Fake sounddevice: Synthetic-clock Stand-in for Headless Benchmarks ---
+#
+# Streams never touch hardware. They register with the module-level
+# backend and their callbacks only run when the benchmark calls
+# run_output() / run_input(), which advance a synthetic sample clock.
+
+
+class CallbackFlags:
+    def __init__(self):
+        self.input_overflow = False
+        self.input_underflow = False
+        self.output_overflow = False
+        self.output_underflow = False
+        self.priming_output = False
+
+    def __bool__(self):
+        return False
+
+
+class _TimeInfo:
+    def __init__(self, now, latency):
+        self.currentTime = now
+        self.inputBufferAdcTime = now - latency
+        self.outputBufferDacTime = now + latency
+
+
+class _Backend:
+    def __init__(self):
+        self.streams = []
+        self.blocksize = 512
+        self.frames = 0
+        self.fs = 44100
+        self.loopback = None
+        self._line = np.zeros(0, dtype=np.float32)
+
+    def reset(self, blocksize=512, fs=44100, loopback=None):
+        self.streams = []
+        self.blocksize = blocksize
+        self.frames = 0
+        self.fs = fs
+        # Round-trip delay in samples from duplex output back to input;
+        # must be at least one block, as with real hardware
+        self.loopback = loopback
+        self._line = np.zeros(loopback or 0, dtype=np.float32)
+
+    def active(self, kind):
+        return [s for s in self.streams if s.active and isinstance(s, kind)]
+
+
+backend = _Backend()
+_FLAGS = CallbackFlags()
+default = type("default", (), {"device": [None, None], "samplerate": None})()
+
+
+class _StreamBase:
+    def __init__(
+        self,
+        samplerate=None,
+        blocksize=None,
+        device=None,
+        channels=1,
+        dtype="float32",
+        latency=None,
+        callback=None,
+        **kwargs,
+    ):
+        self.samplerate = samplerate or backend.fs
+        self.blocksize = blocksize or 0
+        self.device = device
+        if isinstance(channels, (tuple, list)):
+            self.channels = tuple(int(c) for c in channels)
+        else:
+            self.channels = int(channels)
+        self.dtype = dtype
+        self.callback = callback
+        self.active = False
+        self.closed = False
+        self.latency = latency if isinstance(latency, (int, float)) else 0.01
+        self.cpu_load = 0.0
+        backend.streams.append(self)
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        self.active = False
+        self.closed = True
+        if self in backend.streams:
+            backend.streams.remove(self)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _time_info(self):
+        return _TimeInfo(backend.frames / self.samplerate, self.latency)
+
+
+class OutputStream(_StreamBase):
+    pass
+
+
+class InputStream(_StreamBase):
+    pass
+
+
+class Stream(_StreamBase):
+    pass
+
+
+# --- Drive Every Active Output Callback for One Block ---
+def run_output(frames=None):
+    frames = frames or backend.blocksize
+    for stream in backend.active(OutputStream):
+        # Reuse one buffer per stream, like PortAudio does
+        out = getattr(stream, "_out", None)
+        if out is None or out.shape[0] != frames:
+            out = stream._out = np.zeros((frames, stream.channels), dtype=np.float32)
+        stream.callback(out, frames, stream._time_info(), _FLAGS)
+    backend.frames += frames
+
+
+# --- Drive Every Active Input Callback With a Synthetic Signal ---
+def run_input(frames=None, signal=None):
+    frames = frames or backend.blocksize
+    for stream in backend.active(InputStream):
+        if signal is None:
+            indata = np.zeros((frames, stream.channels), dtype=np.float32)
+        else:
+            indata = np.broadcast_to(signal[:frames, None], (frames, stream.channels))
+        stream.callback(indata, frames, stream._time_info(), _FLAGS)
+    backend.frames += frames
+
+
+# --- Drive Every Active Duplex Callback, Optionally Looping Output Back ---
+def run_duplex(frames=None):
+    frames = frames or backend.blocksize
+    for stream in backend.active(Stream):
+        in_ch, out_ch = stream.channels if isinstance(stream.channels, tuple) else (
+            stream.channels,
+            stream.channels,
+        )
+        out = np.zeros((frames, out_ch), dtype=np.float32)
+        indata = np.zeros((frames, in_ch), dtype=np.float32)
+        if backend.loopback is not None:
+            indata[:, 0] = backend._line[:frames]
+        stream.callback(indata, out, frames, stream._time_info(), _FLAGS)
+        if backend.loopback is not None:
+            line = np.concatenate([backend._line, out[:, 0]])
+            backend._line = line[frames:]
+    backend.frames += frames
+
+
+def query_devices(device=None, kind=None):
+    info = {
+        "name": "Fake Device",
+        "index": 0,
+        "hostapi": 0,
+        "max_input_channels": 2,
+        "max_output_channels": 2,
+        "default_low_input_latency": 0.005,
+        "default_low_output_latency": 0.005,
+        "default_high_input_latency": 0.02,
+        "default_high_output_latency": 0.02,
+        "default_samplerate": float(backend.fs),
+    }
+    if device is None and kind is None:
+        return [info]
+    return info
+
+
+def check_input_settings(*args, **kwargs):
+    pass
+
+
+def check_output_settings(*args, **kwargs):
+    pass
+
+
+def sleep(msec):
+    pass
+
+
+# --- Replace the Real Module Before audio.* Is Imported ---
+def install():
+    sys.modules["sounddevice"] = sys.modules[__name__]
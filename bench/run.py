@@ -0,0 +1,429 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from bench import fake_sounddevice as fake
+
+fake.install()
+
+from audio.effects import Biquad, Delay  # noqa: E402
+from audio.engine import AudioTrack, Clip, ClipIndex  # noqa: E402
+from audio.graph import MixGraph, pan_gains  # noqa: E402
+from audio.meters import TRACK_METERS, MeterBank  # noqa: E402
+from audio.mixer import Mixer  # noqa: E402
+
+FS = 44100
+# Worst error each correctness check allows
+TOLERANCES = {
+    # Float32 block output against a float64 reference, relative to peak
+    "biquad_max_error": 1e-5,
+    "delay_rate_error": 1e-6,
+    # Float32 mix of a few overlapping clips against a float64 sum
+    "clip_index_error": 1e-5,
+    # Metering adds no per-block buffers to the plain mix; the slack is
+    # tracemalloc noise from short-lived view objects
+    "meter_alloc_bytes": 512,
+}
+
+
+# --- Summarize Per-callback Timings (Nanoseconds) ---
+def summarize(times_ns, blocksize, fs=FS):
+    us = np.asarray(times_ns, dtype=np.float64) / 1000
+    budget_us = blocksize / fs * 1e6
+    p99 = float(np.percentile(us, 99))
+    return {
+        "p50_us": float(np.percentile(us, 50)),
+        "p90_us": float(np.percentile(us, 90)),
+        "p99_us": p99,
+        "p999_us": float(np.percentile(us, 99.9)),
+        "max_us": float(us.max()),
+        "budget_us": budget_us,
+        "dsp_load_p99": p99 / budget_us,
+        "headroom_p99": budget_us / p99 if p99 > 0 else float("inf"),
+    }
+
+
+# --- Transient Bytes Allocated per Block (tracemalloc Peak) ---
+def allocations(step, blocks):
+    tracemalloc.start()
+    try:
+        peaks = []
+        for _ in range(blocks):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            step()
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_bytes_per_block": float(np.mean(peaks)),
+        "alloc_bytes_max": int(max(peaks)),
+    }
+
+
+## --- Playback: Mixer.audio_callback Through the Fake Output Stream ---
+def bench_callback(tracks, blocksize, minutes, callbacks, metronome=False):
+    fake.backend.reset(blocksize=blocksize, fs=FS)
+    # np.zeros is lazily backed, so long takes cost no resident memory here
+    take = np.zeros(int(minutes * 60 * FS), dtype=np.float32)
+
+    mixer = Mixer(fs=FS)
+    for _ in range(tracks):
+        track = AudioTrack()
+        track.data = take
+        mixer.tracks.append(track)
+    mixer.update()
+    mixer.metronome_enabled = metronome
+    mixer.start_transport()
+    mixer.current_sample = max(0, len(take) // 2 - callbacks * blocksize // 2)
+
+    for _ in range(min(20, callbacks)):
+        fake.run_output(blocksize)
+
+    times = np.zeros(callbacks, dtype=np.int64)
+    clock = time.perf_counter_ns
+    for i in range(callbacks):
+        began = clock()
+        fake.run_output(blocksize)
+        times[i] = clock() - began
+
+    result = {
+        "kind": "callback",
+        "tracks": tracks,
+        "blocksize": blocksize,
+        "minutes": minutes,
+        "callbacks": callbacks,
+    }
+    result.update(summarize(times, blocksize))
+    result.update(allocations(lambda: fake.run_output(blocksize), min(50, callbacks)))
+    mixer.stop()
+    return result
+
+
+# --- Frames Waiting Between the Input Callback and the Writer ---
+def pending(track):
+    return track.ring.pending if track.ring is not None else 0
+
+
+## --- Recording: Input Callback Plus Writer Thread at Full Speed ---
+def bench_recording(blocksize, minutes, live_buffer=True):
+    fake.backend.reset(blocksize=blocksize, fs=FS)
+    track = AudioTrack()
+    track.fs = FS
+    track.live_buffer = live_buffer
+    total_blocks = int(minutes * 60 * FS) // blocksize
+    signal = (np.random.default_rng(0).random(blocksize, dtype=np.float32) - 0.5) * 0.5
+
+    track.record()
+    max_pending = track.ring.capacity // 2
+    while not fake.backend.active(fake.InputStream):
+        if not track.is_recording:
+            raise RuntimeError("recording failed to start")
+        time.sleep(0.001)
+
+    times = np.zeros(total_blocks, dtype=np.int64)
+    checkpoints = []
+    clock = time.perf_counter_ns
+    began = time.perf_counter()
+    for i in range(total_blocks):
+        # Throttle to the writer so the backlog stays bounded
+        while pending(track) > max_pending:
+            time.sleep(0.0005)
+        t0 = clock()
+        fake.run_input(blocksize, signal)
+        times[i] = clock() - t0
+        if i % max(1, total_blocks // 10) == 0:
+            checkpoints.append(time.perf_counter())
+    while pending(track) > 0:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - began
+    track.stop_recording()
+
+    # Late vs early segment throughput exposes super-linear writer cost
+    segments = np.diff(checkpoints) if len(checkpoints) > 2 else [elapsed]
+    result = {
+        "kind": "recording",
+        "tracks": 1,
+        "blocksize": blocksize,
+        "minutes": minutes,
+        "frames": total_blocks * blocksize,
+        "writer_realtime": (total_blocks * blocksize / FS) / elapsed,
+        "late_vs_early": float(segments[-1] / segments[0]) if segments[0] else 1.0,
+        "recorded_frames": 0 if track.data is None else len(track.data),
+        "ring_high_water": track.ring.high_water,
+        "dropped_frames": track.ring.dropped,
+    }
+    result.update(summarize(times, blocksize))
+    track.cleanup()
+    return result
+
+
+## --- Accuracy: Biquad Blocks Against a Per-sample Direct-form Filter ---
+#
+# Covers first-order (a2 = 0) and repeated-pole designs, and block sizes
+# that leave partial sub-blocks. Returns the worst error seen.
+def check_biquads(frames=2048, fs=FS):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-0.5, 0.5, (2, frames)).astype(np.float32)
+    sizes = (64, 100, 1, 256, 37)
+    worst = 0.0
+    for shape in ("lowpass", "highpass", "peak", "lowshelf", "highshelf"):
+        for freq in (20.0, 1000.0, 3675.0, fs / 4, fs * 0.45):
+            for q in (0.05, 0.25, 0.5, 0.707, 4.0, 20.0):
+                for db in (-12.0, 12.0):
+                    effect = Biquad(fs, shape=shape, freq=freq, q=q, db=db)
+                    (b0, b1, b2), (_, a1, a2) = effect.ba
+                    ref = np.empty((2, frames))
+                    for c in range(2):
+                        x1 = x2 = y1 = y2 = 0.0
+                        for i, v in enumerate(x[c].tolist()):
+                            y = b0 * v + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+                            x1, x2, y1, y2 = v, x1, y, y1
+                            ref[c, i] = y
+                    out = x.copy()
+                    done = i = 0
+                    while done < frames:
+                        n = min(sizes[i % len(sizes)], frames - done)
+                        effect.process(out[:, done : done + n])
+                        done += n
+                        i += 1
+                    scale = max(1.0, float(np.abs(ref).max()))
+                    error = float(np.abs(out - ref).max()) / scale
+                    # NaN output must fail the check, not compare away
+                    if np.isnan(error) or error > worst:
+                        worst = error
+                        if np.isnan(error):
+                            return worst
+    return worst
+
+
+# --- Delay Rate Change on a Wider-than-stereo Source ---
+#
+# Each of 4 channels gets an impulse after the rate change; returns the
+# worst deviation from a clean echo at the new delay (inf if it raises).
+def check_delay_rate(fs=48000, channels=4):
+    effect = Delay(FS, time=0.001, feedback=0.0, mix=0.5)
+    try:
+        effect.process(np.zeros((channels, 256), dtype=np.float32))
+        effect.set_rate(fs)
+        block = np.zeros((channels, 256), dtype=np.float32)
+        block[:, 0] = 1.0
+        effect.process(block)
+    except Exception:
+        return float("inf")
+    expected = np.zeros_like(block)
+    expected[:, 0] = 1.0
+    expected[:, int(0.001 * fs)] = 0.5
+    return float(np.abs(block - expected).max())
+
+
+# --- Nested Clips: One Full-length Clip Under Many Short Ones ---
+#
+# Compares ClipIndex.read_into against summing every clip by hand over
+# random blocks; returns the worst error and the lookup time per block.
+def check_clip_index(clips=5000, minutes=10, blocksize=256, blocks=200):
+    rng = np.random.default_rng(1)
+    frames = int(minutes * 60 * FS)
+    source = rng.uniform(-0.5, 0.5, frames).astype(np.float32)
+    layout = [Clip(source, 0, 0, frames, gain=0.5)]
+    for start in np.sort(rng.integers(0, frames - FS, clips)).tolist():
+        length = int(rng.integers(FS // 10, FS))
+        layout.append(Clip(source, start, int(rng.integers(0, FS)), length))
+    index = ClipIndex(layout)
+
+    worst = 0.0
+    dest = np.empty(blocksize, dtype=np.float32)
+    starts = rng.integers(0, frames, blocks).tolist()
+    began = time.perf_counter_ns()
+    for start in starts:
+        index.read_into(dest, start, blocksize)
+    per_block_us = (time.perf_counter_ns() - began) / blocks / 1000
+    for start in starts:
+        index.read_into(dest, start, blocksize)
+        expected = np.zeros(blocksize, dtype=np.float64)
+        for clip in layout:
+            a, b = max(start, clip.start), min(start + blocksize, clip.end)
+            if b > a:
+                skip = clip.offset - clip.start
+                src = clip.source[skip + a : skip + b]
+                expected[a - start : b - start] += src * clip.gain
+        worst = max(worst, float(np.abs(dest - expected).max()))
+    return worst, per_block_us
+
+
+# --- Metering Next to the Mix It Measures ---
+#
+# Mixes mono and stereo tracks, in adjacent and in gapped (muted between)
+# meter slots, with and without a MeterBank. Returns the worst extra bytes
+# metering allocates per block and its worst extra time per block.
+def check_metering(tracks=16, blocksize=64, blocks=500):
+    rng = np.random.default_rng(2)
+    out = np.zeros((blocksize, 2), dtype=np.float32)
+    bank = MeterBank(TRACK_METERS + 1)
+    worst_bytes, worst_us = 0, 0.0
+    for spacing in (1, 2):
+        sources, gains = [], []
+        for i in range(tracks):
+            channels = 1 + i % 2
+            shape = (FS, channels) if channels > 1 else FS
+            sources.append(rng.uniform(-0.5, 0.5, shape).astype(np.float32))
+            gains.append(pan_gains(0.0, channels, 2))
+        graph = MixGraph(sources, gains, range(0, tracks * spacing, spacing))
+
+        def plain():
+            graph.mix(out, 0, blocksize)
+
+        def metered():
+            bank.decay(blocksize, FS)
+            graph.mix(out, 0, blocksize, bank)
+            bank.measure(0, out)
+
+        us, allocated = [], []
+        for step in (plain, metered):
+            step()
+            began = time.perf_counter_ns()
+            for _ in range(blocks):
+                step()
+            us.append((time.perf_counter_ns() - began) / blocks / 1000)
+            allocated.append(allocations(step, 50)["alloc_bytes_max"])
+        worst_bytes = max(worst_bytes, allocated[1] - allocated[0])
+        worst_us = max(worst_us, us[1] - us[0])
+    return worst_bytes, worst_us
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except Exception:
+        return None
+
+
+# --- Flag Cases Whose p99 Grew by More Than the Threshold ---
+def compare(baseline, current, threshold):
+    def key(r):
+        return (r["kind"], r["tracks"], r["blocksize"], r["minutes"])
+
+    old = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        before = old.get(key(r))
+        if before and r["p99_us"] > before["p99_us"] * (1 + threshold):
+            regressions.append((key(r), before["p99_us"], r["p99_us"]))
+    return regressions
+
+
+def parse_list(value, cast=int):
+    return [cast(v) for v in value.split(",") if v]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless Tuidio audio benchmarks")
+    parser.add_argument("--tracks", default="1,4,16,64,256")
+    parser.add_argument("--blocks", default="32,128,512,1024,4096")
+    parser.add_argument("--minutes", default="1,10,60")
+    parser.add_argument("--callbacks", type=int, default=300)
+    parser.add_argument("--record-blocks", default="256,1024")
+    parser.add_argument("--record-minutes", default="1,10,60")
+    parser.add_argument("--skip-callback", action="store_true")
+    parser.add_argument("--skip-record", action="store_true")
+    parser.add_argument("--skip-check", action="store_true")
+    parser.add_argument("--metronome", action="store_true")
+    parser.add_argument("--quick", action="store_true", help="small smoke sweep")
+    parser.add_argument("--out", help="write JSON results to this file")
+    parser.add_argument("--baseline", help="compare p99 against a previous run")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.tracks, args.blocks, args.minutes = "1,16", "64,512", "1"
+        args.record_blocks, args.record_minutes = "512", "0.1"
+        args.callbacks = 100
+
+    results = []
+    if not args.skip_callback:
+        for minutes in parse_list(args.minutes, float):
+            for tracks in parse_list(args.tracks):
+                for blocksize in parse_list(args.blocks):
+                    r = bench_callback(
+                        tracks, blocksize, minutes, args.callbacks, args.metronome
+                    )
+                    results.append(r)
+                    print(
+                        f"callback  tracks={tracks:<4} block={blocksize:<5} "
+                        f"min={minutes:<5g} p99={r['p99_us']:9.1f}us "
+                        f"load={r['dsp_load_p99']:6.1%} "
+                        f"alloc={r['alloc_bytes_per_block']:9.0f}B",
+                        file=sys.stderr,
+                    )
+    if not args.skip_record:
+        for minutes in parse_list(args.record_minutes, float):
+            for blocksize in parse_list(args.record_blocks):
+                r = bench_recording(blocksize, minutes)
+                results.append(r)
+                print(
+                    f"recording block={blocksize:<5} min={minutes:<5g} "
+                    f"writer={r['writer_realtime']:8.1f}x "
+                    f"late/early={r['late_vs_early']:5.2f}",
+                    file=sys.stderr,
+                )
+
+    checks = {}
+    if not args.skip_check:
+        checks["biquad_max_error"] = check_biquads()
+        checks["delay_rate_error"] = check_delay_rate()
+        checks["clip_index_error"], lookup_us = check_clip_index()
+        print(f"check     nested clip lookup {lookup_us:.1f}us/block", file=sys.stderr)
+        checks["meter_alloc_bytes"], meter_us = check_metering()
+        print(f"check     metering {meter_us:.1f}us/block over the mix", file=sys.stderr)
+        for name, value in checks.items():
+            print(f"check     {name}={value:.2e}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "fs": FS,
+        },
+        "results": results,
+        "checks": checks,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    failed = [
+        name for name, value in checks.items() if not value <= TOLERANCES[name]
+    ]
+    for name in failed:
+        print(f"CHECK FAILED {name}={checks[name]:.2e}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: p99 {before:.1f}us -> {after:.1f}us", file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,19 @@
-from ui.tui import Tuidio
+import sys
+import time
+
+STARTED = time.perf_counter()
 
 if __name__ == "__main__":
-    Tuidio().run()
+    args = sys.argv[1:]
+    if args[:1] == ["render"]:
+        # Headless: no Textual, no audio device needed
+        from audio.batch import main as render
+
+        sys.exit(render(args[1:]))
+
+    from ui.tui import Tuidio
+
+    # --isolated runs the mixer and recording in a separate audio process
+    isolated = "--isolated" in args
+    paths = [a for a in args if not a.startswith("--")]
+    Tuidio(paths[0] if paths else None, started=STARTED, isolated=isolated).run()
@@ -1,59 +1,123 @@
 import os
 import numpy as np
-import sounddevice as sd
 import time
+import threading
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical, ScrollableContainer, Container
 from textual.widgets import Button, Label, Static, Select
 from textual.reactive import reactive
 from audio.engine import AudioTrack
+from audio.history import EditHistory
 from audio.mixer import Mixer
-
-# --- Device Options Initialization ---
-try:
-    ALL_DEVICES = sd.query_devices()
-    INPUT_OPTS = [
-        (f"{d['name'][:18]}", i)
-        for i, d in enumerate(ALL_DEVICES)
-        if d["max_input_channels"] > 0
-    ]
-    OUTPUT_OPTS = [
-        (f"{d['name'][:18]}", i)
-        for i, d in enumerate(ALL_DEVICES)
-        if d["max_output_channels"] > 0
-    ]
-except:
-    INPUT_OPTS = [("Default", 0)]
-    OUTPUT_OPTS = [("Default", 0)]
+from audio.process import RemoteMixer
+from audio.render import Renderer
+from audio.telemetry import export_stats
+from audio.project import Project
+from audio.devices import devices
+from audio.meters import to_db
+from audio.profiles import PROFILE_NAMES
 
 
 ## --- Track Widget (Single Track UI) ---
 class TrackWidget(Static):
     is_recording = reactive(False)
     volume_lvl = reactive(7)
+    pan_lvl = reactive(0)
     is_muted = reactive(False)
     is_soloed = reactive(False)
     playhead_idx = reactive(-1)
 
-    def __init__(self):
+    def __init__(self, audio_track=None, lazy=False):
         super().__init__()
-        self.audio_track = AudioTrack()
+        self.audio_track = audio_track or AudioTrack()
+        # Lazy widgets compose a placeholder until scrolled into view
+        self.materialized = not lazy
+        # True while recompose() builds the controls; materialized follows
+        # only once they are mounted and can be queried
+        self.materializing = False
+        self.in_view = not lazy
+        self.waveform_dirty = True
         self.last_top = ""
         self.last_bot = ""
+        self.meter_text = meter_bar(0.0, 0.0, 0)
+        self.view_start = 0
+        self.view_seconds = 30
+        if audio_track is not None:
+            self.set_reactive(TrackWidget.volume_lvl, round(audio_track.volume * 10))
+            self.set_reactive(TrackWidget.pan_lvl, round(audio_track.pan * 5))
+            self.set_reactive(TrackWidget.is_muted, audio_track.is_muted)
+            self.set_reactive(TrackWidget.is_soloed, audio_track.is_soloed)
+
+    def on_mount(self):
+        if self.is_muted:
+            self.add_class("track-muted")
+        if self.is_soloed:
+            self.add_class("track-solo")
+        if self.audio_track.frozen is not None:
+            self.add_class("track-frozen")
+        self.app.track_widgets_changed()
+        self.update_waveform()
+
+    def on_unmount(self):
+        self.app.track_widgets_changed()
+
+    # --- Pick Up Track State Changed Outside the Widget (Undo / Redo) ---
+    def sync_track(self):
+        track = self.audio_track
+        self.volume_lvl = round(track.volume * 10)
+        self.pan_lvl = round(track.pan * 5)
+        self.is_muted = track.is_muted
+        self.is_soloed = track.is_soloed
+        self.set_class(self.is_muted, "track-muted")
+        self.set_class(self.is_soloed, "track-solo")
+        self.set_class(track.frozen is not None, "track-frozen")
+        if self.materialized:
+            self.query_one("#vol-display").update(self.get_bar(self.volume_lvl))
+            self.query_one("#pan-display").update(self.get_pan_bar(self.pan_lvl))
+        self.update_waveform()
+
+    # --- Build the Real Controls the First Time the Track Is Visible ---
+    async def materialize(self):
+        if self.materialized or self.materializing:
+            return
+        self.materializing = True
+        try:
+            await self.recompose()
+        finally:
+            self.materializing = False
+        self.materialized = True
+        self.update_waveform()
+
+    # --- Called by the App When the Track Scrolls In or Out of View ---
+    def set_in_view(self, in_view):
+        self.in_view = in_view
+        if not in_view:
+            return
+        if not self.materialized:
+            self.call_later(self.materialize)
+        elif self.waveform_dirty:
+            self.update_waveform()
 
     def get_bar(self, level) -> str:
         return "█" * level + "░" * (10 - level)
 
+    def get_pan_bar(self, level) -> str:
+        return "─" * (level + 5) + "●" + "─" * (5 - level)
+
     # --- Compose Track Widget UI ---
     def compose(self) -> ComposeResult:
+        if not (self.materialized or self.materializing):
+            yield Label("󰎆 TRK", classes="track-label")
+            return
         with Horizontal(classes="track-card"):
             with Vertical(classes="track-sidebar"):
                 with Horizontal(classes="track-top-row"):
                     yield Label("󰎆 TRK", classes="track-label")
                     yield Button("✖", id="btn-close", classes="btn-close")
 
+                # Filled from the device registry once its scan finishes
                 yield Select(
-                    options=INPUT_OPTS,
+                    options=devices.inputs(),
                     prompt="Input Device",
                     id="input-select",
                     classes="mini-select",
@@ -65,42 +129,59 @@ class TrackWidget(Static):
                     yield Button("▶", id="btn-play", classes="btn-icon")
                     yield Button("M", id="btn-mute", classes="btn-icon")
                     yield Button("S", id="btn-solo", classes="btn-icon")
+                    yield Button("F", id="btn-freeze", classes="btn-icon")
 
                 with Horizontal(classes="vol-row"):
                     yield Button("-", id="btn-vol-down", classes="btn-vol")
                     yield Label(f"{self.get_bar(self.volume_lvl)}", id="vol-display")
                     yield Button("+", id="btn-vol-up", classes="btn-vol")
 
+                with Horizontal(classes="pan-row"):
+                    yield Button("L", id="btn-pan-left", classes="btn-vol")
+                    yield Label(f"{self.get_pan_bar(self.pan_lvl)}", id="pan-display")
+                    yield Button("R", id="btn-pan-right", classes="btn-vol")
+
+                # Levels computed in the audio callback, polled by sync_ui
+                yield Label(self.meter_text, id="meter-display")
+
             with Vertical(classes="waveform-area"):
                 yield Label(" ", id="wave-top", classes="wave-line top")
                 yield Label(" ", id="wave-bottom", classes="wave-line bot")
 
     # --- Update Waveform Visualization ---
     def update_waveform(self):
+        if not (self.in_view and self.materialized):
+            # Redrawn when it scrolls back into view
+            self.waveform_dirty = True
+            return
+        self.waveform_dirty = False
         try:
-            data = self.audio_track.data
-            if data is None:
+            peaks = self.audio_track.peaks
+            if peaks.frames == 0:
                 return
 
             width = 55
-            window_samples = 44100 * 30
+            window_samples = int(44100 * self.view_seconds)
             samples_per_char = window_samples // width
 
-            filled_chars = min(width, len(data) // samples_per_char)
+            filled_chars = min(
+                width, max(0, (peaks.frames - self.view_start) // samples_per_char)
+            )
 
             chars_up = ["_", "▂", "▂", "▃", "▄", "▅", "▆", "▇", "█"]
             chars_down = [" ", "▔", "▔", "🬇", "🬆", "🬅", "🬄", "🬃", "🬂", "▀"]
 
+            # Peak pyramid lookup keeps this O(width) regardless of take length
+            mins, maxs = peaks.peaks(self.view_start, samples_per_char, width)
+            amps = np.maximum(np.abs(mins), np.abs(maxs))
+            levels = (amps * 200).astype(int)
+
             top_str = ""
             bot_str = ""
 
             for i in range(width):
                 if i < filled_chars:
-                    start = i * samples_per_char
-                    end = (i + 1) * samples_per_char
-                    chunk = data[start:end]
-                    amp = np.max(np.abs(chunk)) if len(chunk) > 0 else 0
-                    idx = int(amp * 200)
+                    idx = levels[i]
                     top_str += chars_up[min(idx, len(chars_up) - 1)]
                     bot_str += chars_down[min(idx, len(chars_down) - 1)]
                 else:
@@ -109,35 +190,62 @@ class TrackWidget(Static):
 
             self.last_top = top_str
             self.last_bot = bot_str
-            self.query_one("#wave-top").update(top_str)
-            self.query_one("#wave-bottom").update(bot_str)
+            self.draw_playhead(self.playhead_idx)
         except:
             pass
 
+    # --- Zoom and Scroll the Waveform View ---
+    def set_view(self, start_sample=None, seconds=None):
+        if start_sample is not None:
+            self.view_start = max(0, int(start_sample))
+        if seconds is not None:
+            self.view_seconds = max(1, seconds)
+        self.update_waveform()
+
+    # --- Only Fires When the Playhead Moves to Another Cell ---
     def watch_playhead_idx(self, idx: int):
         if not self.last_top:
             return
+        if not self.in_view:
+            self.waveform_dirty = True
+            return
+        self.draw_playhead(idx)
 
-        t = list(self.last_top)
-        b = list(self.last_bot)
-
-        if 0 <= idx < len(t):
-            t[idx] = "[bold yellow]█[/]"
-            b[idx] = "[bold yellow]█[/]"
-
-        self.query_one("#wave-top").update("".join(t))
-        self.query_one("#wave-bottom").update("".join(b))
+    # --- Only Redraws When the Meter Text Changes ---
+    def show_meter(self, text):
+        if text == self.meter_text:
+            return
+        self.meter_text = text
+        self.query_one("#meter-display").update(text)
+
+    def draw_playhead(self, idx):
+        top, bot = self.last_top, self.last_bot
+        if 0 <= idx < len(top):
+            mark = "[bold yellow]█[/]"
+            top = top[:idx] + mark + top[idx + 1 :]
+            bot = bot[:idx] + mark + bot[idx + 1 :]
+        self.query_one("#wave-top").update(top)
+        self.query_one("#wave-bottom").update(bot)
 
     # --- Handle Track Button Events ---
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "btn-close":
-            if self.audio_track in self.app.mixer.tracks:
-                self.app.mixer.tracks.remove(self.audio_track)
-            self.audio_track.cleanup()
+            if self.is_recording:
+                # Finish the take first so no input stream outlives the track
+                self.stop_and_update()
+            # The take's files are deleted once history lets go of it
+            self.app.mixer.remove_track(self.audio_track)
+            self.app.checkpoint(
+                "remove track",
+                [tw.audio_track for tw in self.app.track_widgets if tw is not self],
+            )
             self.remove()
         elif event.button.id == "btn-rec":
             if not self.is_recording:
-                self.audio_track.record()
+                if self.app.overdub_mode:
+                    self.app.mixer.start_overdub(self.audio_track)
+                else:
+                    self.app.mixer.record_track(self.audio_track)
                 self.is_recording = True
                 self.app.start_timer()
                 self.add_class("active-rec")
@@ -148,6 +256,8 @@ class TrackWidget(Static):
         elif event.button.id == "btn-mute":
             self.is_muted = not self.is_muted
             self.audio_track.is_muted = self.is_muted
+            self.app.mixer.update()
+            self.app.checkpoint("mute")
             if self.is_muted:
                 self.add_class("track-muted")
             else:
@@ -155,10 +265,21 @@ class TrackWidget(Static):
         elif event.button.id == "btn-solo":
             self.is_soloed = not self.is_soloed
             self.audio_track.is_soloed = self.is_soloed
+            self.app.mixer.update()
+            self.app.checkpoint("solo")
             if self.is_soloed:
                 self.add_class("track-solo")
             else:
                 self.remove_class("track-solo")
+        elif event.button.id == "btn-freeze":
+            # Render the insert chain once; playback then just reads it
+            track = self.audio_track
+            if track.frozen is not None:
+                track.unfreeze()
+            else:
+                track.freeze()
+            self.app.mixer.update()
+            self.set_class(track.frozen is not None, "track-frozen")
         elif event.button.id == "btn-play":
             self.app.play_track_solo(self)
         elif "vol" in event.button.id:
@@ -166,16 +287,29 @@ class TrackWidget(Static):
                 10, max(0, self.volume_lvl + (1 if "up" in event.button.id else -1))
             )
             self.audio_track.volume = self.volume_lvl / 10
+            self.app.mixer.update()
+            self.app.checkpoint("volume")
             self.query_one("#vol-display").update(self.get_bar(self.volume_lvl))
+        elif "pan" in event.button.id:
+            self.pan_lvl = min(
+                5, max(-5, self.pan_lvl + (1 if "right" in event.button.id else -1))
+            )
+            self.audio_track.pan = self.pan_lvl / 5
+            self.app.mixer.update()
+            self.app.checkpoint("pan")
+            self.query_one("#pan-display").update(self.get_pan_bar(self.pan_lvl))
 
     # --- Stop Recording and Update UI ---
     def stop_and_update(self):
-        self.audio_track.stop_recording()
+        if self.app.mixer.overdub_track is self.audio_track:
+            self.app.mixer.stop_overdub()
+        else:
+            self.app.mixer.stop_track(self.audio_track)
         self.is_recording = False
         self.app.stop_timer()
         self.remove_class("active-rec")
-        if self.audio_track not in self.app.mixer.tracks:
-            self.app.mixer.tracks.append(self.audio_track)
+        self.app.mixer.add_track(self.audio_track)
+        self.app.checkpoint("record")
         self.update_waveform()
 
     # --- Handle Input Device Selection ---
@@ -184,6 +318,17 @@ class TrackWidget(Static):
             self.audio_track.set_input_device(event.value)
 
 
+# --- Meter Text: RMS Cells Solid, Peak Beyond Them Shaded, -60..0 dBFS ---
+def meter_bar(peak, rms, clips, width=10):
+    def cells(level):
+        return int(round((to_db(level) + 60) / 60 * width))
+
+    p = cells(peak)
+    r = min(cells(rms), p)
+    clip = "[red]●[/]" if clips else "○"
+    return f"{'█' * r}{'▒' * (p - r)}{'░' * (width - p)} {to_db(peak):4.0f} {clip}"
+
+
 ## --- Main Application Class ---
 class Tuidio(App):
     master_volume = reactive(7)
@@ -227,6 +372,10 @@ class Tuidio(App):
     .vol-row { height: 1; align: left middle; }
     .btn-vol { min-width: 3; height: 1; border: none; background: transparent; }
     #vol-display { width: 12; text-align: center; color: #333; }
+    .pan-row { height: 1; align: left middle; }
+    #pan-display { width: 12; text-align: center; color: #333; }
+    #meter-display { height: 1; color: #4a4; }
+    #m-meter-display { color: #4a4; }
 
     .waveform-area {
         width: 1fr;
@@ -243,13 +392,49 @@ class Tuidio(App):
     .wave-line.top { content-align: center bottom; color: white; }
     .wave-line.bot { content-align: center top; color: #666; }
 
+    .panel-title { margin-top: 1; }
+    #telemetry { color: #666; }
+
     .track-muted { opacity: 0.4; }
     .track-solo #btn-solo { color: yellow; }
+    .track-frozen #btn-freeze { color: cyan; }
     """
 
-    def __init__(self):
+    BINDINGS = [
+        ("ctrl+s", "save_project", "Save"),
+        ("ctrl+z", "undo", "Undo"),
+        ("ctrl+y", "redo", "Redo"),
+        ("ctrl+r", "rescan_devices", "Devices"),
+    ]
+
+    # UI refresh period bounds (seconds); sync_ui adapts between them
+    SYNC_FAST = 0.05
+    SYNC_IDLE = 0.25
+    SYNC_SLOW = 0.5
+
+    # Seconds between hot-plug checks (a listing of the sound device nodes)
+    DEVICE_POLL = 5.0
+
+    def __init__(self, project_path=None, started=None, isolated=False):
         super().__init__()
-        self.mixer = Mixer()
+        # Process start (main.py) or construction time, for time-to-first-frame
+        self.started = started or time.perf_counter()
+        self.first_frame = None
+        # isolated: mixer and recording run in a separate audio process
+        self.mixer = RemoteMixer() if isolated else Mixer()
+        self._track_widgets = None
+        self.playhead_idx = -1
+        self.master_meter_text = meter_bar(0.0, 0.0, 0)
+        self.measuring = False
+        self.sync_interval = 0.1
+        self.sync_timer = None
+        self.overdub_mode = False
+        self.history = EditHistory()
+        self.project = Project(project_path) if project_path else None
+        if self.project and self.project.exists:
+            session = self.project.load(self.mixer)
+            self.set_reactive(Tuidio.bpm, self.mixer.bpm)
+            self.set_reactive(Tuidio.master_volume, session.get("master_volume", 7))
 
     # --- Compose Main Application UI ---
     def compose(self) -> ComposeResult:
@@ -260,20 +445,26 @@ class Tuidio(App):
                 yield Button("▶", id="all-play", classes="btn-text")
                 yield Button("■", id="all-stop", classes="btn-text")
                 yield Button("󰓟", id="btn-metronome", classes="btn-text")
+                yield Button("󰈝", id="btn-export", classes="btn-text")
                 yield Label(" BPM:")
                 yield Button("-", id="bpm-down", classes="btn-mini")
                 yield Label(str(self.bpm), id="bpm-display")
                 yield Button("+", id="bpm-up", classes="btn-mini")
                 yield Label(" Out:", classes="label-out")
                 yield Select(
-                    options=OUTPUT_OPTS, prompt="Output Device", id="output-select"
+                    options=devices.outputs(),
+                    prompt="Output Device",
+                    id="output-select",
                 )
                 yield Label(self.time_display, id="clock")
 
             with Horizontal(id="main-workspace"):
                 with Vertical(id="arranger-column"):
                     with ScrollableContainer(id="arranger-scroll"):
-                        yield TrackWidget()
+                        for track in self.mixer.tracks:
+                            yield TrackWidget(track, lazy=True)
+                        if not self.mixer.tracks:
+                            yield TrackWidget()
                 with Vertical(id="side-panel"):
                     yield Label("󰓠 MASTER")
                     with Horizontal(classes="master-vol-row"):
@@ -282,38 +473,318 @@ class Tuidio(App):
                             self.get_bar(self.master_volume), id="m-vol-display"
                         )
                         yield Button("+", id="m-vol-up", classes="btn-text")
+                    yield Label(meter_bar(0.0, 0.0, 0), id="m-meter-display")
+                    yield Label("", id="render-status")
+                    yield Label("󰓅 ENGINE", classes="panel-title")
+                    yield Label("", id="telemetry")
+                    yield Button("Export Stats", id="export-stats", classes="btn-text")
+                    yield Button("Disk Stream", id="btn-stream", classes="btn-text")
+                    yield Button("Overdub", id="btn-overdub", classes="btn-text")
+                    yield Button("Measure Latency", id="btn-latency", classes="btn-text")
+                    yield Button(
+                        f"Profile: {self.mixer.profile}", id="btn-profile", classes="btn-text"
+                    )
+                    yield Label("lat  0.0 ms", id="latency-display")
 
     def on_mount(self):
-        self.set_interval(0.1, self.sync_ui)
+        self.checkpoint("open")
+        self.call_after_refresh(self.on_first_frame)
+        self.sync_timer = self.set_interval(self.sync_interval, self.sync_ui)
+        arranger = self.query_one("#arranger-scroll")
+        self.watch(arranger, "scroll_y", self.refresh_visible, init=False)
+        self.call_after_refresh(self.refresh_visible)
+
+    def on_resize(self, event):
+        self.call_after_refresh(self.refresh_visible)
+
+    # --- Enumerate Devices Only After the UI Is on Screen ---
+    def on_first_frame(self):
+        self.first_frame = time.perf_counter() - self.started
+        devices.subscribe(self.on_devices_changed)
+        devices.refresh()
+        self.set_interval(self.DEVICE_POLL, self.poll_devices)
+        self.set_interval(1.0, self.mixer.tune)
+
+    def on_unmount(self):
+        devices.unsubscribe(self.on_devices_changed)
+        # Deletes scratch takes only undo could still bring back
+        self.history.clear()
+        # Also shuts down the audio process when running isolated
+        self.mixer.stop()
+
+    # --- Registry Listener (Scanner Thread) ---
+    def on_devices_changed(self, registry):
+        try:
+            self.call_from_thread(self.fill_device_selects)
+        except Exception:
+            pass
+
+    def fill_device_selects(self):
+        self.fill_select(self.query_one("#output-select"), devices.outputs())
+        for tw in self.track_widgets:
+            if tw.materialized:
+                self.fill_select(tw.query_one("#input-select"), devices.inputs())
+
+    @staticmethod
+    def fill_select(select, options):
+        value = select.value
+        select.set_options(options)
+        if any(index == value for _, index in options):
+            select.value = value
+
+    # --- Rescan When Devices Were Hot-plugged, Only While Audio Is Idle ---
+    #
+    # Probing rates opens devices, so it stays off hardware in use here or
+    # in an isolated engine; a hot-plug seen meanwhile waits for idle.
+    def poll_devices(self):
+        mixer = self.mixer
+        if mixer.is_playing or mixer.overdub_track is not None or self.measuring:
+            return
+        if devices.busy or any(tw.is_recording for tw in self.track_widgets):
+            return
+        if devices.hotplugged():
+            devices.refresh(rescan=True)
+
+    # --- Rescan on Request (Platforms Without a Hot-plug Signal) ---
+    def action_rescan_devices(self):
+        devices.refresh(rescan=True)
+        self.query_one("#render-status").update("Rescanning audio devices...")
+
+    # --- Track Widgets in Arranger Order (Cached Between Mounts) ---
+    @property
+    def track_widgets(self):
+        if self._track_widgets is None:
+            self._track_widgets = list(self.query(TrackWidget))
+        return self._track_widgets
+
+    def track_widgets_changed(self):
+        self._track_widgets = None
+        self.call_after_refresh(self.refresh_visible)
+
+    # --- Tell Each Track Whether It Is Inside the Arranger Viewport ---
+    def refresh_visible(self, *_):
+        try:
+            arranger = self.query_one("#arranger-scroll")
+        except Exception:
+            return
+        top = arranger.scroll_offset.y
+        bottom = top + arranger.scrollable_content_region.height
+        for tw in self.track_widgets:
+            region = tw.virtual_region
+            in_view = region.y < bottom and region.y + region.height > top
+            if in_view != tw.in_view or (in_view and not tw.materialized):
+                tw.set_in_view(in_view)
+                if in_view:
+                    tw.playhead_idx = self.playhead_idx
 
     def sync_ui(self):
+        began = time.perf_counter()
+        widgets = self.track_widgets
         if self.mixer.is_playing:
             elapsed = self.mixer.current_sample / self.mixer.fs
             mins, secs = divmod(int(elapsed), 60)
             msecs = int((elapsed % 1) * 100)
             self.query_one("#clock").update(f"{mins:02}:{secs:02}:{msecs:02}")
 
-            idx = int((self.mixer.current_sample / (self.mixer.fs * 30)) * 55)
-            for tw in self.query(TrackWidget):
-                tw.playhead_idx = idx
-
-        for tw in self.query(TrackWidget):
+            self.playhead_idx = int(
+                (self.mixer.current_sample / (self.mixer.fs * 30)) * 55
+            )
+            # Reactive: widgets only redraw when their playhead cell changes
+            for tw in widgets:
+                if tw.in_view:
+                    tw.playhead_idx = self.playhead_idx
+
+        recording = False
+        mixer = self.mixer
+        for tw in widgets:
             if tw.is_recording:
+                recording = True
                 tw.update_waveform()
+            if tw.in_view and tw.materialized:
+                tw.show_meter(meter_bar(*mixer.track_meter(tw.audio_track)))
+        master = meter_bar(*mixer.master_meter())
+        if master != self.master_meter_text:
+            self.master_meter_text = master
+            self.query_one("#m-meter-display").update(master)
+
+        self.update_telemetry()
+        self.adapt_refresh(time.perf_counter() - began, recording)
+
+    # --- Slow the UI Tick When Idle or When It Competes With Audio ---
+    def adapt_refresh(self, busy, recording):
+        if self.mixer.is_playing or recording:
+            # Keep UI work under ~10% of the tick
+            interval = max(self.SYNC_FAST, busy * 10)
+        else:
+            interval = self.SYNC_IDLE
+        if self.mixer.stats.avg_load > 0.7:
+            interval = self.SYNC_SLOW
+        interval = min(self.SYNC_SLOW, interval)
+        if abs(interval - self.sync_interval) < 0.02:
+            return
+        self.sync_interval = interval
+        if self.sync_timer is not None:
+            self.sync_timer.stop()
+        self.sync_timer = self.set_interval(interval, self.sync_ui)
+
+    # --- Streams Whose Callback Stats Are Shown and Exported ---
+    def telemetry_streams(self):
+        streams = [self.mixer.stats]
+        for i, tw in enumerate(self.track_widgets):
+            if tw.audio_track.stats.callbacks:
+                tw.audio_track.stats.name = f"input {i + 1}"
+                streams.append(tw.audio_track.stats)
+        return streams
+
+    # --- Refresh Live DSP Load and Xrun Counters ---
+    def update_telemetry(self):
+        lines = []
+        for stats in self.telemetry_streams():
+            lines.append(
+                f"{stats.name[:8]:<8} {stats.avg_load:4.0%} "
+                f"pk {stats.peak_load:4.0%} xr {stats.xruns}"
+            )
+            if stats.ring is not None:
+                lines.append(
+                    f"{'':<8} hw {stats.ring.high_water / stats.ring.capacity:4.0%} "
+                    f"drop {stats.ring.dropped}"
+                )
+        if self.mixer.prefetcher:
+            lines.append(f"{'disk':<8} ur {self.mixer.prefetcher.underruns}")
+        lines.append(f"{'block':<8} {self.mixer.blocksize} ({self.mixer.profile})")
+        if isinstance(self.mixer, RemoteMixer) and self.mixer.engine is not None:
+            priority = ("normal", "nice", "rt fifo")[self.mixer.realtime]
+            lines.append(f"{'engine':<8} pid {self.mixer.engine.process.pid} {priority}")
+        if self.first_frame is not None:
+            lines.append(f"{'ui':<8} ttff {self.first_frame * 1000:.0f} ms")
+        if devices.ready.is_set():
+            lines.append(
+                f"{'devices':<8} {len(devices.devices)} in "
+                f"{devices.scan_seconds * 1000:.0f} ms"
+            )
+        try:
+            self.query_one("#telemetry").update("\n".join(lines))
+        except:
+            pass
+
+    def export_telemetry(self):
+        path = os.path.abspath(f"tuidio_stats_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        try:
+            export_stats(path, self.telemetry_streams())
+            self.query_one("#render-status").update(os.path.basename(path))
+        except Exception as e:
+            self.query_one("#render-status").update(f"Stats export failed: {e}")
 
     def play_track_solo(self, track_widget):
-        for tw in self.query(TrackWidget):
+        for tw in self.track_widgets:
             tw.audio_track.is_soloed = False
         track_widget.audio_track.is_soloed = True
+        self.mixer.update()
         self.mixer.start_transport()
 
     def stop_all(self):
         self.mixer.stop_transport()
         self.stop_timer()
-        for tw in self.query(TrackWidget):
+        for tw in self.track_widgets:
             tw.playhead_idx = -1
             tw.update_waveform()
 
+    # --- Record the Arranger's Tracks After an Edit ---
+    def checkpoint(self, label, tracks=None):
+        if tracks is None:
+            tracks = [tw.audio_track for tw in self.track_widgets]
+        self.history.commit(tracks, label)
+
+    async def action_undo(self):
+        await self.step_history(self.history.undo_label(), self.history.undo, "Undo")
+
+    async def action_redo(self):
+        await self.step_history(self.history.redo_label(), self.history.redo, "Redo")
+
+    async def step_history(self, label, step, verb):
+        if label is None or any(tw.is_recording for tw in self.track_widgets):
+            return
+        await self.restore_tracks(step())
+        self.query_one("#render-status").update(f"{verb} {label}")
+
+    # --- Make the Arranger Match a Restored History State ---
+    async def restore_tracks(self, tracks):
+        arranger = self.query_one("#arranger-scroll")
+        widgets = {tw.audio_track: tw for tw in self.track_widgets}
+        for track, tw in widgets.items():
+            if track not in tracks:
+                await tw.remove()
+        for i, track in enumerate(tracks):
+            tw = widgets.get(track)
+            if tw is not None:
+                tw.sync_track()
+            elif i < len(arranger.children):
+                await arranger.mount(TrackWidget(track, lazy=True), before=i)
+            else:
+                await arranger.mount(TrackWidget(track, lazy=True))
+        self.mixer.set_tracks(tracks)
+        self.track_widgets_changed()
+
+    # --- Save the Session (Only Changed Takes Are Written) ---
+    def action_save_project(self):
+        if self.project is None:
+            self.project = Project("session.tuidio")
+        self.mixer.set_tracks(tw.audio_track for tw in self.track_widgets)
+        status = self.query_one("#render-status")
+        try:
+            result = self.project.save(
+                self.mixer,
+                extra={"master_volume": self.master_volume},
+                keep=self.history.uids(),
+            )
+            status.update(
+                f"Saved {os.path.basename(result['path'])}\n"
+                f"{result['written']}/{result['tracks']} takes written"
+            )
+        except Exception as e:
+            status.update(f"Save failed: {e}")
+
+    # --- Measure Round-trip Latency in a Worker Thread ---
+    def measure_latency(self):
+        display = self.query_one("#latency-display")
+        display.update("lat measuring...")
+        tw = next(iter(self.track_widgets), None)
+        device = tw.audio_track.input_device if tw else None
+
+        def _task():
+            try:
+                lag = self.mixer.measure_latency(device)
+                source = "loop" if self.mixer.latency_measured else "drv"
+                msg = f"lat {lag / self.mixer.fs * 1000:4.1f} ms ({source})"
+            except Exception as e:
+                msg = f"lat failed: {e}"
+            finally:
+                self.measuring = False
+            self.call_from_thread(display.update, msg)
+
+        self.measuring = True
+        threading.Thread(target=_task, daemon=True).start()
+
+    # --- Render Mixdown Offline in a Worker Thread ---
+    def export_mixdown(self):
+        self.mixer.set_tracks(tw.audio_track for tw in self.track_widgets)
+        path = os.path.abspath(f"mixdown_{time.strftime('%Y%m%d_%H%M%S')}.wav")
+        status = self.query_one("#render-status")
+        if self.mixer.length == 0:
+            status.update("Nothing to export")
+            return
+        status.update("Rendering...")
+
+        def _task():
+            try:
+                result = Renderer(self.mixer).render(path)
+                msg = f"{os.path.basename(path)}\n{result['realtime']:.0f}x realtime"
+            except Exception as e:
+                msg = f"Export failed: {e}"
+            self.call_from_thread(status.update, msg)
+
+        threading.Thread(target=_task, daemon=True).start()
+
     # --- Volume Bar Helper ---
     def get_bar(self, level):
         return "█" * level + "░" * (10 - level)
@@ -342,11 +813,33 @@ class Tuidio(App):
         if event.button.id == "add-track":
             new_track = TrackWidget()
             self.query_one("#arranger-scroll").mount(new_track)
+            tracks = [tw.audio_track for tw in self.track_widgets if tw is not new_track]
+            self.checkpoint("add track", tracks + [new_track.audio_track])
         elif event.button.id == "btn-metronome":
             self.mixer.metronome_enabled = not self.mixer.metronome_enabled
             event.button.toggle_class("metronome-on")
             if self.mixer.metronome_enabled:
                 self.mixer.ensure_stream()
+        elif event.button.id == "btn-export":
+            self.export_mixdown()
+        elif event.button.id == "export-stats":
+            self.export_telemetry()
+        elif event.button.id == "btn-overdub":
+            self.overdub_mode = not self.overdub_mode
+            event.button.toggle_class("metronome-on")
+        elif event.button.id == "btn-latency":
+            self.measure_latency()
+        elif event.button.id == "btn-profile":
+            names = PROFILE_NAMES
+            profile = names[(names.index(self.mixer.profile) + 1) % len(names)]
+            self.mixer.set_profile(profile)
+            event.button.label = f"Profile: {profile}"
+        elif event.button.id == "btn-stream":
+            if self.mixer.streaming:
+                self.mixer.disable_streaming()
+            else:
+                self.mixer.enable_streaming()
+            event.button.toggle_class("metronome-on")
         elif "bpm" in event.button.id:
             self.bpm = max(
                 40, min(240, self.bpm + (5 if "up" in event.button.id else -5))
@@ -359,9 +852,9 @@ class Tuidio(App):
             )
             self.query_one("#m-vol-display").update(self.get_bar(self.master_volume))
         elif event.button.id == "all-play":
-            self.mixer.tracks = [tw.audio_track for tw in self.query(TrackWidget)]
-            for tw in self.query(TrackWidget):
+            for tw in self.track_widgets:
                 tw.audio_track.is_soloed = False
+            self.mixer.set_tracks(tw.audio_track for tw in self.track_widgets)
             self.mixer.start_transport()
         elif event.button.id == "all-stop":
             self.stop_all()